@@ -1,34 +1,164 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import pandas as pd
-import pickle
 import faiss
 import numpy as np
-from utils.search import search_with_intent
-from utils.embeddings import embed_query
-import speech_recognition as sr
+from utils.search import HYBRID_SEARCH, search_with_intent, search_many
+from utils.embeddings import embed_query, warm_up, enable_query_batching
+import utils.embeddings as embeddings_module
+import utils.openai_intent as intent_module
+from utils.openai_intent import make_intent_cache, set_intent_cache
+from utils.artifacts import current_release_dir, load_artifacts, release_version, validate_artifacts
+from utils.audio import decode_audio, stream_decode, TARGET_RATE
+from utils.transcription import enable_transcription_pool, open_stream, transcribe
+from utils.incremental_search import IncrementalSearch
 import base64
-import io
-import wave
+import hmac
+import json
 import os
-import tempfile
-from pydub import AudioSegment
+import threading
+import time
 
 app = Flask(__name__)
 CORS(app)
 
-df = None
-index = None
-id_map = None
+# Published release being served (utils.artifacts.SearchArtifacts). reload_artifacts() replaces
+# it as a whole; requests read it once, so in-flight ones finish on the version they started with.
+artifacts = None
+reload_lock = threading.Lock()
+reload_status = {'reloads': 0, 'loaded_at': None, 'last_error': None}
+
+# Seconds between checks for a newly published release (0 disables the watcher).
+RELOAD_POLL_S = float(os.getenv('RELOAD_POLL_S', '10'))
+# Shared secret required by POST /api/reload; the endpoint is disabled while it is unset.
+RELOAD_TOKEN = os.getenv('RELOAD_TOKEN', '')
+
+# Set once the index, catalog and model are loaded; /api/health reports 503 until then.
+ready = threading.Event()
+
+def text_index_for(release):
+    """
+    The release's BM25 text index when hybrid search is enabled, else None (embedding-only search).
+    Releases built before the text index existed have none.
+    """
+    return release.text_index if HYBRID_SEARCH else None
 
 def load_data():
-    global df, index, id_map
-    df = pd.read_csv('data/netflix_titles.csv')
-    
-    with open('models/id_map.pkl', 'rb') as f:
-        id_map = pickle.load(f)
-    
-    index = faiss.read_index('models/netflix_faiss.index')
+    global artifacts
+    artifacts = load_artifacts()
+    validate_artifacts(artifacts)
+    reload_status['loaded_at'] = time.time()
+
+    # Load the embedding model now rather than on the first search request
+    warm_up()
+    ready.set()
+
+def reload_artifacts(force=False):
+    """
+    Loads the published release in the calling thread if it differs from the one being served,
+    validates it and swaps it in. A release that fails to load or validate is not served.
+    Args:
+        force (bool): Reload even if the version did not change.
+    Returns:
+        bool: Whether a new release was swapped in.
+    """
+    global artifacts
+    with reload_lock:
+        try:
+            release_dir = current_release_dir()
+            if not force and artifacts is not None and release_version(release_dir) == artifacts.version:
+                reload_status['last_error'] = None
+                return False
+            candidate = load_artifacts(release_dir)
+            validate_artifacts(candidate)
+        except Exception as e:
+            reload_status['last_error'] = f"{type(e).__name__}: {e}"
+            print(f"Keeping release {artifacts.version if artifacts else None}; reload failed: {e}")
+            return False
+        previous, artifacts = artifacts, candidate
+        reload_status.update(reloads=reload_status['reloads'] + 1, loaded_at=time.time(), last_error=None)
+        print(f"Serving release {candidate.version} (was {previous.version if previous else None})")
+        return True
+
+def watch_artifacts(interval=None):
+    """
+    Starts a daemon thread that reloads the artifacts when a new release is published.
+    """
+    interval = RELOAD_POLL_S if interval is None else interval
+    if interval <= 0:
+        return None
+
+    def poll():
+        while True:
+            time.sleep(interval)
+            reload_artifacts()
+
+    watcher = threading.Thread(target=poll, name='artifact-watcher', daemon=True)
+    watcher.start()
+    return watcher
+
+def init_worker():
+    """
+    Starts per-process state that cannot be inherited across fork: the embedding
+    micro-batcher thread, the intent cache's SQLite connection, the transcription pool
+    and the release watcher.
+    """
+    set_intent_cache(make_intent_cache())
+    enable_query_batching()
+    enable_transcription_pool()
+    watch_artifacts()
+
+def create_app():
+    """
+    WSGI application factory for production servers.
+    With gunicorn's preload_app (see gunicorn.conf.py) this runs once in the master, so the
+    index, catalog and model pages are shared copy-on-write by all forked workers.
+    """
+    load_data()
+    return app
+
+@app.before_request
+def require_ready():
+    if request.path.startswith(('/api/search', '/api/transcribe/search')) and not ready.is_set():
+        return jsonify({'error': 'Service is starting'}), 503
+
+# Upper bound on the number of queries accepted by /api/search/batch.
+MAX_BATCH_QUERIES = int(os.getenv('MAX_BATCH_QUERIES', '64'))
+# Largest top_k a search request may ask for.
+MAX_TOP_K = int(os.getenv('MAX_TOP_K', '50'))
+# Read size for streamed audio request bodies.
+AUDIO_CHUNK_BYTES = 64 * 1024
+
+def parse_top_k(value):
+    """
+    Parses a requested top_k.
+    Returns:
+        int or None: The value if it is an integer in [1, MAX_TOP_K], else None.
+    """
+    try:
+        top_k = int(value)
+    except (TypeError, ValueError):
+        return None
+    return top_k if 1 <= top_k <= MAX_TOP_K else None
+
+def results_to_movies(results):
+    movies = []
+    for _, row in results.iterrows():
+        movie = {
+            'id': row['show_id'],
+            'title': row['title'],
+            'type': row['type'],
+            'director': row['director'] if pd.notna(row['director']) else '',
+            'cast': row['cast'] if pd.notna(row['cast']) else '',
+            'country': row['country'] if pd.notna(row['country']) else '',
+            'release_year': int(row['release_year']) if pd.notna(row['release_year']) else None,
+            'rating': row['rating'] if pd.notna(row['rating']) else '',
+            'duration': str(row['duration_cleaned']) + ' min' if pd.notna(row['duration_cleaned']) else '',
+            'listed_in': row['listed_in'] if pd.notna(row['listed_in']) else '',
+            'description': row['description'] if pd.notna(row['description']) else ''
+        }
+        movies.append(movie)
+    return movies
 
 @app.route('/api/search', methods=['POST'])
 def search():
@@ -39,26 +169,40 @@ def search():
         if not query:
             return jsonify({'error': 'Query is required'}), 400
         
-        results = search_with_intent(query, index, id_map, top_k=5)
+        release = artifacts
+        results = search_with_intent(query, release.index, release.id_map, top_k=5,
+                                     filter_index=release.filter_index, embeddings=release.embeddings,
+                                     text_index=text_index_for(release))
+        
+        return jsonify({'movies': results_to_movies(results)})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/search/batch', methods=['POST'])
+def search_batch():
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        queries = data.get('queries', [])
+        top_k = parse_top_k(data.get('top_k', 5))
+        
+        if top_k is None:
+            return jsonify({'error': f'top_k must be an integer between 1 and {MAX_TOP_K}'}), 400
+        if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q for q in queries):
+            return jsonify({'error': 'A non-empty list of queries is required'}), 400
+        if len(queries) > MAX_BATCH_QUERIES:
+            return jsonify({'error': f'At most {MAX_BATCH_QUERIES} queries per batch'}), 400
         
-        movies = []
-        for _, row in results.iterrows():
-            movie = {
-                'id': row['show_id'],
-                'title': row['title'],
-                'type': row['type'],
-                'director': row['director'] if pd.notna(row['director']) else '',
-                'cast': row['cast'] if pd.notna(row['cast']) else '',
-                'country': row['country'] if pd.notna(row['country']) else '',
-                'release_year': int(row['release_year']) if pd.notna(row['release_year']) else None,
-                'rating': row['rating'] if pd.notna(row['rating']) else '',
-                'duration': str(row['duration_cleaned']) + ' min' if pd.notna(row['duration_cleaned']) else '',
-                'listed_in': row['listed_in'] if pd.notna(row['listed_in']) else '',
-                'description': row['description'] if pd.notna(row['description']) else ''
-            }
-            movies.append(movie)
+        release = artifacts
+        results = search_many(queries, release.index, release.id_map, top_k=top_k,
+                              filter_index=release.filter_index, embeddings=release.embeddings,
+                              text_index=text_index_for(release))
         
-        return jsonify({'movies': movies})
+        return jsonify({'results': [
+            {'query': query, 'movies': results_to_movies(result)} for query, result in zip(queries, results)
+        ]})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -72,38 +216,107 @@ def transcribe_audio():
         if not audio_data:
             return jsonify({'error': 'Audio data is required'}), 400
         
-        audio_bytes = base64.b64decode(audio_data.split(',')[1])
-        
-        with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as temp_input:
-            temp_input.write(audio_bytes)
-            temp_input_path = temp_input.name
-        
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_output:
-            temp_output_path = temp_output.name
-        
-        try:
-            audio = AudioSegment.from_file(temp_input_path, format="webm")
-            audio = audio.set_frame_rate(16000).set_channels(1)
-            audio.export(temp_output_path, format="wav")
-            
-            recognizer = sr.Recognizer()
-            with sr.AudioFile(temp_output_path) as source:
-                audio_data = recognizer.record(source)
-            
-            text = recognizer.recognize_google(audio_data)
-            return jsonify({'transcription': text})
-        
-        finally:
-            os.unlink(temp_input_path)
-            os.unlink(temp_output_path)
+        audio_bytes = base64.b64decode(audio_data.split(',')[-1])
+        pcm = decode_audio(audio_bytes)
+        if not len(pcm):
+            return jsonify({'error': 'Audio data is required'}), 400
+        return jsonify({'transcription': transcribe(pcm)})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/transcribe/stream', methods=['POST'])
+def transcribe_audio_stream():
+    """
+    Transcribes a raw audio body (webm/ogg/wav, plain or chunked transfer encoding).
+    The body is piped to the decoder as it arrives instead of being buffered and base64-decoded.
+    """
+    try:
+        # Bound here: ffmpeg is fed from another thread, where the request proxy is not available
+        body = request.stream
+        chunks = iter(lambda: body.read(AUDIO_CHUNK_BYTES), b'')
+        pcm = decode_audio(chunks)
+        if not len(pcm):
+            return jsonify({'error': 'Audio data is required'}), 400
+        return jsonify({'transcription': transcribe(pcm)})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/transcribe/search', methods=['POST'])
+def transcribe_and_search():
+    """
+    Search as you speak: transcribes a raw audio body incrementally and streams NDJSON events.
+    Stable partial transcripts produce {"type": "partial"} events with speculative embedding-only
+    results; the last event is {"type": "final"} with the intent-aware results (or {"type": "error"}).
+    """
+    top_k = parse_top_k(request.args.get('top_k', 5))
+    if top_k is None:
+        return jsonify({'error': f'top_k must be an integer between 1 and {MAX_TOP_K}'}), 400
+    # Bound here: the body is read by the ffmpeg feed thread, outside the request context
+    body = request.stream
+    chunks = iter(lambda: body.read(AUDIO_CHUNK_BYTES), b'')
+
+    def events():
+        release = artifacts
+        search = IncrementalSearch(release.index, release.id_map, top_k=top_k,
+                                   filter_index=release.filter_index, embeddings=release.embeddings,
+                                   text_index=text_index_for(release))
+        try:
+            stream = open_stream(TARGET_RATE)
+            position = 0.0
+            for pcm in stream_decode(chunks):
+                position += len(pcm) / TARGET_RATE
+                results = search.update(stream.accept(pcm), now=position)
+                if results is not None:
+                    yield json.dumps({'type': 'partial', 'transcription': search.last_query,
+                                      'movies': results_to_movies(results)}) + '\n'
+            transcription = stream.finish()
+            if not transcription:
+                yield json.dumps({'type': 'error', 'error': 'No speech recognized'}) + '\n'
+                return
+            results = search.finalize(transcription)
+            yield json.dumps({'type': 'final', 'transcription': transcription,
+                              'movies': results_to_movies(results)}) + '\n'
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+
+    return Response(stream_with_context(events()), mimetype='application/x-ndjson')
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    batcher = embeddings_module.query_batcher
+    intent_cache = intent_module.get_intent_cache()
+    return jsonify({
+        'embedding_batcher': batcher.stats() if batcher is not None else None,
+        'embedding_cache': embeddings_module.query_cache.stats(),
+        'intent_cache': intent_cache.stats() if intent_cache is not None else None,
+        'release': {'version': artifacts.version if artifacts is not None else None, **reload_status}
+    })
+
+@app.route('/api/reload', methods=['POST'])
+def reload():
+    """
+    Loads the published release now instead of waiting for the watcher.
+    """
+    if not RELOAD_TOKEN:
+        return jsonify({'error': 'Reload endpoint is disabled; set RELOAD_TOKEN to enable it'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Reload-Token', ''), RELOAD_TOKEN):
+        return jsonify({'error': 'Invalid reload token'}), 403
+    if not ready.is_set():
+        return jsonify({'error': 'Service is starting'}), 503
+    reloaded = reload_artifacts(force=bool((request.get_json(silent=True) or {}).get('force')))
+    if reload_status['last_error'] and not reloaded:
+        return jsonify({'reloaded': False, 'version': artifacts.version, 'error': reload_status['last_error']}), 409
+    return jsonify({'reloaded': reloaded, 'version': artifacts.version})
+
 @app.route('/api/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'healthy'})
+    if not ready.is_set():
+        return jsonify({'status': 'starting'}), 503
+    return jsonify({'status': 'healthy', 'version': artifacts.version})
 
 if __name__ == '__main__':
     load_data()
+    init_worker()
     app.run(debug=True, port=5000) 
\ No newline at end of file
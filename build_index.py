@@ -1,10 +1,109 @@
-from utils.preprocess import preprocess_netflix_data
-from utils.faiss_io import build_faiss_index, save_faiss_index, save_id_map
+import argparse
+import os
+import shutil
+import time
+from utils.preprocess import DEFAULT_CHUNK_ROWS, iter_preprocessed_netflix_data, preprocess_netflix_data
+from utils.artifacts import (MODELS_DIR, SearchArtifacts, artifact_paths, current_release_dir, new_release_dir,
+                             publish_release, validate_artifacts)
+from utils.catalog_update import content_hashes, update_catalog
+from utils.embeddings import generate_embeddings
+from utils.faiss_io import (COMPACT_INDEX_SPEC, DEFAULT_INDEX_SPEC, create_faiss_index, embed_catalog_batches, load_embeddings,
+                            load_faiss_index, load_id_map, load_index_params, save_faiss_index, save_id_map)
+from utils.filter_index import build_filter_index, save_filter_index
+from utils.sharded_embeddings import DEFAULT_SHARD_ROWS, ShardedEmbedder
+from utils.text_index import build_text_index, save_text_index
 
-df = preprocess_netflix_data("./data/netflix_titles.csv")
-index, id_map = build_faiss_index(df)
+CATALOG_CSV = "./data/netflix_titles.csv"
 
-save_faiss_index(index, "./models/netflix_faiss.index")
-save_id_map(id_map, "./models/id_map.pkl")
+parser = argparse.ArgumentParser(description="Build the FAISS index, catalog and filter index.")
+parser.add_argument("--incremental", action="store_true",
+                    help="Update the published release: embed only new/changed titles, drop removed ones")
+parser.add_argument("--index-spec",
+                    help='faiss.index_factory spec: "Flat" (exact, default), "HNSW32", "IVF1024,PQ16", ...')
+parser.add_argument("--compact", action="store_true",
+                    help=f"Keep catalog vectors as float16 and default to a {COMPACT_INDEX_SPEC} index re-ranked "
+                         "against them (about a quarter of the memory per title)")
+parser.add_argument("--train-size", type=int, help="Vectors sampled to train IVF/PQ indexes (default: all)")
+parser.add_argument("--nprobe", type=int, help="IVF lists scanned per query (default 16)")
+parser.add_argument("--ef-search", type=int, help="HNSW search beam width (default 64)")
+parser.add_argument("--ef-construction", type=int, help="HNSW construction beam width")
+parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_ROWS,
+                    help="CSV rows preprocessed and embedded at a time (bounds memory on large catalogs)")
+parser.add_argument("--workers", type=int,
+                    help="Embed in shards on this many processes, saving each shard so a crashed build resumes "
+                         "(0: sharded in this process; default: one in-process encode)")
+parser.add_argument("--shard-rows", type=int, default=DEFAULT_SHARD_ROWS, help="Rows per embedding shard")
+parser.add_argument("--batch-size", type=int, default=64, help="Texts per model batch in sharded mode")
+parser.add_argument("--threads", type=int, help="Inference threads per worker (default: all cores)")
+parser.add_argument("--shard-dir", default=os.path.join(MODELS_DIR, 'embedding_shards'),
+                    help="Completed shards; removed once the build is published")
+parser.add_argument("--report", action="store_true", help="Measure recall@10 vs flat, latency and memory")
 
-print("FAISS index and ID map saved to /models.")
+def main(args):
+    """
+    Builds (or incrementally updates) the artifacts and publishes them as a new release.
+    """
+    start = time.perf_counter()
+
+    embed = generate_embeddings
+    if args.workers is not None:
+        embed = ShardedEmbedder(args.shard_dir, args.workers, args.shard_rows, args.batch_size, args.threads)
+
+    if args.incremental:
+        # Index spec and parameters are carried over from the published release
+        current = artifact_paths(current_release_dir())
+        params = load_index_params(current['index'])
+        id_map, embeddings, index, stats = update_catalog(
+            load_id_map(current['catalog']), load_embeddings(current['catalog']), load_faiss_index(current['index'], mmap=False),
+            preprocess_netflix_data(CATALOG_CSV), embed, params
+        )
+        params = {'spec': params.get('spec', DEFAULT_INDEX_SPEC), 'train_size': params.get('train_size'),
+                  'ef_construction': params.get('ef_construction'),
+                  'vectors_dtype': params.get('vectors_dtype', 'float32')}
+        print(f"Incremental update: {stats}")
+    else:
+        search_params = {name: value for name, value in (('nprobe', args.nprobe), ('efSearch', args.ef_search)) if value}
+        # The CSV is streamed: each chunk is preprocessed and embedded before the next is read
+        id_map, embeddings = embed_catalog_batches(iter_preprocessed_netflix_data(CATALOG_CSV, args.chunksize), embed)
+        spec = args.index_spec or (COMPACT_INDEX_SPEC if args.compact else DEFAULT_INDEX_SPEC)
+        index = create_faiss_index(embeddings, spec, args.train_size, search_params, args.ef_construction)
+        id_map['content_hash'] = content_hashes(id_map['embedding_input'])
+        id_map['deleted'] = False
+        params = {'spec': spec, 'train_size': args.train_size, 'ef_construction': args.ef_construction,
+                  'vectors_dtype': 'float16' if args.compact else 'float32'}
+    # The catalog matrix is stored once, in the build's dtype; searches re-rank lossy indexes with it
+    embeddings = embeddings.astype(params['vectors_dtype'], copy=False)
+
+    if args.workers is not None:
+        embed.close()
+        print(f"Embedded {embed.embedded_rows} rows ({embed.resumed_rows} from completed shards) at "
+              f"{embed.rows_per_second():,.0f} rows/s with {args.workers} workers x {args.threads or 'all'} threads, "
+              f"batch size {args.batch_size}")
+
+    filter_index = build_filter_index(id_map)
+    text_index = build_text_index(id_map)
+
+    if args.report:
+        from evaluation.benchmark_index import benchmark_index, benchmark_queries
+        params['report'] = benchmark_index(index, embeddings, benchmark_queries(embeddings))
+        print(params['report'])
+
+    # Refuse to publish a release the API would reject
+    validate_artifacts(SearchArtifacts(None, index, id_map, embeddings, filter_index, text_index))
+
+    release_dir = new_release_dir()
+    paths = artifact_paths(release_dir)
+    save_faiss_index(index, paths['index'], params)
+    save_id_map(id_map, paths['catalog'], embeddings, params['vectors_dtype'])
+    save_filter_index(filter_index, paths['filter_index'])
+    save_text_index(text_index, paths['text_index'])
+    publish_release(release_dir)
+    if args.workers is not None:
+        shutil.rmtree(args.shard_dir, ignore_errors=True)
+
+    print(f"FAISS index ({params['spec']}), ID map, filter and text indexes saved to {release_dir} "
+          f"and published as models/current in {time.perf_counter() - start:.1f}s.")
+
+# Guarded so the spawned embedding workers can import this module without running a build
+if __name__ == "__main__":
+    main(parser.parse_args())
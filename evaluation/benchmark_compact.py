@@ -0,0 +1,63 @@
+import argparse
+import time
+import numpy as np
+from evaluation.benchmark_index import benchmark_queries, index_memory_bytes, recall_at_k
+from evaluation.test_queries import test_queries
+from utils.artifacts import artifact_paths
+from utils.faiss_io import RERANK_FACTOR, create_faiss_index, load_embeddings, search_index
+
+def benchmark_storage(embeddings, spec, vectors_dtype, queries, exact, k=10, train_size=None):
+    """
+    Measures one storage configuration: an index spec plus the dtype of the catalog matrix used
+    for re-ranking.
+    Args:
+        embeddings (np.ndarray): float32 catalog embedding matrix.
+        spec (str): index_factory spec.
+        vectors_dtype (str): Catalog matrix dtype ('float32' or 'float16').
+        queries (np.ndarray): Normalized query matrix; the first len(test_queries) are the evaluation queries.
+        exact (np.ndarray): Exact float32 top-k ids per query.
+        k (int): Recall cutoff.
+        train_size (int, optional): Training sample for PQ/IVF.
+    Returns:
+        dict: Bytes per title (index in RAM, memory-mapped catalog matrix), recall@k on the evaluation
+        and synthetic queries with and without re-ranking, and p50 latency with re-ranking.
+    """
+    index = create_faiss_index(embeddings, spec, train_size)
+    matrix = np.ascontiguousarray(embeddings, dtype=vectors_dtype)
+    real = len(test_queries)
+
+    plain = search_index(index, queries, k)
+    reranked = search_index(index, queries, k, matrix)
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search_index(index, query[None, :], k, matrix)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        'index_bytes_per_title': index_memory_bytes(index) / len(embeddings),
+        'matrix_bytes_per_title': matrix.nbytes / len(embeddings),
+        f'recall@{k}_test_queries': recall_at_k(exact[:real], plain[:real], k),
+        f'recall@{k}_test_queries_reranked': recall_at_k(exact[:real], reranked[:real], k),
+        f'recall@{k}_synthetic': recall_at_k(exact[real:], plain[real:], k),
+        f'recall@{k}_synthetic_reranked': recall_at_k(exact[real:], reranked[real:], k),
+        'latency_ms_p50': float(np.percentile(latencies, 50)),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory per title and recall of compact catalog storage.")
+    parser.add_argument("specs", nargs="*", default=["SQfp16", "SQ8", "PQ48", "PQ96"])
+    parser.add_argument("--catalog", default=artifact_paths()['catalog'])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--train-size", type=int)
+    args = parser.parse_args()
+
+    embeddings = np.ascontiguousarray(load_embeddings(args.catalog, mmap=False), dtype=np.float32)
+    queries = benchmark_queries(embeddings)
+    exact = search_index(create_faiss_index(embeddings, 'Flat'), queries, args.k)
+
+    print(f"{len(embeddings)} titles, re-ranking {RERANK_FACTOR} x top-{args.k} candidates")
+    configs = [('Flat', 'float32')] + [(spec, 'float16') for spec in args.specs]
+    for spec, vectors_dtype in configs:
+        report = benchmark_storage(embeddings, spec, vectors_dtype, queries, exact, args.k, args.train_size)
+        total = report['index_bytes_per_title'] + report['matrix_bytes_per_title']
+        print(f"{spec} + {vectors_dtype} catalog: {total:.0f} B/title", {k: round(v, 4) for k, v in report.items()})
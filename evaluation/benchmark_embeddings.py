@@ -0,0 +1,81 @@
+import sys
+import time
+import numpy as np
+from evaluation.test_queries import test_queries
+from utils.embeddings import load_model
+from utils.preprocess import preprocess_netflix_data
+
+# Minimum cosine similarity between a backend's normalized embedding and the torch one.
+PARITY_THRESHOLDS = {'onnx': 0.999, 'onnx-int8': 0.98}
+
+def normalize(embeddings):
+    """
+    L2-normalizes embeddings row-wise.
+    Args:
+        embeddings (np.ndarray): 2D array of embeddings.
+    Returns:
+        np.ndarray: Normalized float32 embeddings.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+def check_parity(reference, candidate, threshold):
+    """
+    Compares two backends' normalized embeddings for the same texts.
+    Args:
+        reference (np.ndarray): Embeddings from the reference backend.
+        candidate (np.ndarray): Embeddings from the candidate backend.
+        threshold (float): Minimum acceptable cosine similarity per text.
+    Returns:
+        dict: Minimum and mean cosine similarity, and whether all texts pass.
+    """
+    cosine = np.sum(normalize(reference) * normalize(candidate), axis=1)
+    return {'min_cosine': float(cosine.min()), 'mean_cosine': float(cosine.mean()),
+            'passed': bool(cosine.min() >= threshold)}
+
+def benchmark_backend(model, queries, corpus, repeats=3):
+    """
+    Measures single-query latency and batch throughput of an embedding model.
+    Args:
+        model: Object exposing encode(texts).
+        queries (list of str): Queries encoded one at a time.
+        corpus (list of str): Texts encoded as one batch job.
+        repeats (int): Passes over the queries for the latency measurement.
+    Returns:
+        dict: Query latency percentiles (ms) and corpus throughput (texts/sec).
+    """
+    model.encode(queries[:1])
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            model.encode([query])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    model.encode(corpus, batch_size=64)
+    elapsed = time.perf_counter() - start
+
+    return {'query_ms_p50': float(np.percentile(latencies, 50)),
+            'query_ms_p95': float(np.percentile(latencies, 95)),
+            'corpus_texts_per_sec': len(corpus) / elapsed}
+
+if __name__ == "__main__":
+    backends = sys.argv[1:] or ['onnx', 'onnx-int8']
+    queries = [test["query"] for test in test_queries]
+    corpus = preprocess_netflix_data("./data/netflix_titles.csv")['embedding_input'].sample(1024, random_state=0).tolist()
+
+    reference_model = load_model('torch')
+    reference = reference_model.encode(queries + corpus)
+    results = {'torch': benchmark_backend(reference_model, queries, corpus)}
+
+    failed = False
+    for backend in backends:
+        model = load_model(backend)
+        parity = check_parity(reference, model.encode(queries + corpus), PARITY_THRESHOLDS[backend])
+        failed |= not parity['passed']
+        results[backend] = {**benchmark_backend(model, queries, corpus), **parity}
+
+    for backend, result in results.items():
+        print(backend, {k: round(v, 4) if isinstance(v, float) else v for k, v in result.items()})
+    sys.exit(1 if failed else 0)
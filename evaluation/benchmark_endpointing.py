@@ -0,0 +1,80 @@
+import argparse
+import sys
+import numpy as np
+from evaluation.benchmark_stt import load_fixtures
+from voice.endpointing import endpoint_clip
+
+FS = 16000
+
+def synthetic_utterance(words, lead_s=0.8, gap_s=0.2, tail_s=4.0, noise_db=-60.0, seed=0):
+    """
+    Builds a recording shaped like a spoken query: background noise, then words (modulated
+    tones) separated by short pauses, then silence.
+    Args:
+        words (int): Number of words.
+        lead_s (float): Silence before speech.
+        gap_s (float): Pause between words (shorter than the endpointing silence).
+        tail_s (float): Silence after speech.
+        noise_db (float): Background noise level (dBFS).
+        seed (int): Noise seed.
+    Returns:
+        tuple: (int16 samples, speech start second, speech end second).
+    """
+    rng = np.random.default_rng(seed)
+    parts, t = [np.zeros(int(lead_s * FS))], lead_s
+    for i in range(words):
+        length = rng.uniform(0.25, 0.45)
+        n = np.arange(int(length * FS))
+        envelope = np.sin(np.pi * n / len(n))
+        parts.append(0.3 * envelope * np.sin(2 * np.pi * rng.uniform(120, 240) * n / FS))
+        t += length
+        if i < words - 1:
+            parts.append(np.zeros(int(gap_s * FS)))
+            t += gap_s
+    speech_end = t
+    parts.append(np.zeros(int(tail_s * FS)))
+    signal = np.concatenate(parts) + rng.normal(0, 10 ** (noise_db / 20), sum(map(len, parts)))
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16), lead_s, speech_end
+
+def benchmark_endpointing(recordings, max_duration_s=12, **endpointing):
+    """
+    Runs endpointing over recordings fed as 30 ms device reads.
+    Args:
+        recordings (list): (name, samples, speech start or None, speech end or None) tuples.
+        max_duration_s (float): Capture limit (the fixed recording length it replaces).
+        **endpointing: Endpointer settings.
+    Returns:
+        list of dict: Per recording, audio consumed before stopping, clip length, and whether
+        the clip covers the known speech region.
+    """
+    results = []
+    for name, samples, speech_start, speech_end in recordings:
+        clip, endpointer = endpoint_clip(samples, FS, max_duration_s=max_duration_s, **endpointing)
+        stopped_s = len(endpointer.frames) * endpointer.frame_len / FS
+        result = {'name': name, 'stopped_s': stopped_s, 'clip_s': len(clip) / FS,
+                  'saved_s': max_duration_s - stopped_s}
+        if speech_start is not None and endpointer.speech_detected:
+            clip_start = max(0, endpointer.speech_start - endpointer.pre_roll_frames) * endpointer.frame_len / FS
+            result['covers_speech'] = clip_start <= speech_start and clip_start + len(clip) / FS >= speech_end
+        elif speech_start is not None:
+            result['covers_speech'] = False
+        results.append(result)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure VAD endpointing against fixed-length capture.")
+    parser.add_argument("--fixtures", help="Folder of WAV recordings (trailing silence is appended)")
+    parser.add_argument("--trailing-silence-ms", type=int, default=700)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        recordings = [(name, np.concatenate([pcm, np.zeros(3 * FS, dtype=np.int16)]), None, None)
+                      for name, pcm, _ in load_fixtures(args.fixtures)]
+    else:
+        recordings = [(f"{words}-word query", *synthetic_utterance(words, seed=words)) for words in (1, 2, 4, 8)]
+
+    results = benchmark_endpointing(recordings, trailing_silence_ms=args.trailing_silence_ms)
+    for result in results:
+        print({k: round(v, 2) if isinstance(v, float) else v for k, v in result.items()})
+    print(f"Mean capture time: {np.mean([r['stopped_s'] for r in results]):.2f}s (fixed capture: 12s)")
+    sys.exit(0 if all(r.get('covers_speech', True) for r in results) else 1)
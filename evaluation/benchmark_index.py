@@ -0,0 +1,97 @@
+import argparse
+import time
+import faiss
+import numpy as np
+from evaluation.test_queries import test_queries
+from utils.artifacts import artifact_paths
+from utils.faiss_io import create_faiss_index, get_search_params, load_embeddings
+
+def benchmark_queries(embeddings, n_synthetic=500, seed=0):
+    """
+    Query vectors for index benchmarks: the evaluation queries plus synthetic queries that
+    sit between two random catalog items (normalized sums), like queries that match several titles.
+    Args:
+        embeddings (np.ndarray): Catalog embedding matrix.
+        n_synthetic (int): Number of synthetic queries.
+        seed (int): Sampling seed.
+    Returns:
+        np.ndarray: Normalized float32 query matrix.
+    """
+    from utils.embeddings import embed_queries
+    rng = np.random.default_rng(seed)
+    pairs = rng.choice(len(embeddings), size=(n_synthetic, 2))
+    synthetic = np.asarray(embeddings[pairs[:, 0]]) + np.asarray(embeddings[pairs[:, 1]])
+    synthetic /= np.linalg.norm(synthetic, axis=1, keepdims=True)
+    real = embed_queries([test["query"] for test in test_queries])
+    return np.ascontiguousarray(np.vstack([real, synthetic]), dtype=np.float32)
+
+def recall_at_k(exact, approx, k):
+    """
+    Mean fraction of the exact top-k found in the approximate top-k.
+    """
+    return float(np.mean([len(np.intersect1d(e[:k], a[:k])) / k for e, a in zip(exact, approx)]))
+
+def index_memory_bytes(index):
+    """
+    Size of the serialized index, which is what it occupies in memory once loaded.
+    """
+    return int(faiss.serialize_index(index).nbytes)
+
+def query_latencies_ms(index, queries, k):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def benchmark_index(index, embeddings, queries, k=10):
+    """
+    Compares an index against exact search over the same embeddings.
+    Args:
+        index (faiss.Index): Index under test.
+        embeddings (np.ndarray): Catalog embedding matrix the index was built from, in the dtype
+            the release stores it in.
+        queries (np.ndarray): Normalized query matrix.
+        k (int): Cutoff for recall and the searches.
+    Returns:
+        dict: recall@k vs flat, single-query latency percentiles and serving memory with each index:
+        the index plus the catalog matrix (embeddings.npy), which the API loads alongside any index.
+    """
+    matrix_bytes = embeddings.nbytes
+    flat = faiss.IndexFlatIP(embeddings.shape[1])
+    flat.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+    _, exact = flat.search(queries, k)
+    _, approx = index.search(queries, k)
+
+    latencies, flat_latencies = query_latencies_ms(index, queries, k), query_latencies_ms(flat, queries, k)
+    return {
+        f'recall@{k}': recall_at_k(exact, approx, k),
+        'latency_ms_p50': float(np.percentile(latencies, 50)),
+        'latency_ms_p95': float(np.percentile(latencies, 95)),
+        'flat_latency_ms_p50': float(np.percentile(flat_latencies, 50)),
+        'index_mb': index_memory_bytes(index) / 2**20,
+        'matrix_mb': matrix_bytes / 2**20,
+        'memory_mb': (index_memory_bytes(index) + matrix_bytes) / 2**20,
+        'flat_memory_mb': (index_memory_bytes(flat) + matrix_bytes) / 2**20,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare FAISS index specs on the built catalog embeddings.")
+    parser.add_argument("specs", nargs="*", default=["Flat", "HNSW32", "IVF256,Flat", "IVF256,PQ32"])
+    parser.add_argument("--catalog", default=artifact_paths()['catalog'])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--train-size", type=int)
+    parser.add_argument("--nprobe", type=int)
+    parser.add_argument("--ef-search", type=int)
+    args = parser.parse_args()
+
+    embeddings = np.ascontiguousarray(load_embeddings(args.catalog, mmap=False))
+    queries = benchmark_queries(embeddings)
+    search_params = {name: value for name, value in (('nprobe', args.nprobe), ('efSearch', args.ef_search)) if value}
+    for spec in args.specs:
+        start = time.perf_counter()
+        index = create_faiss_index(embeddings, spec, args.train_size, search_params)
+        build_s = time.perf_counter() - start
+        report = benchmark_index(index, embeddings, queries, args.k)
+        print(spec, get_search_params(index), {'build_s': round(build_s, 2), **{k: round(v, 4) for k, v in report.items()}})
@@ -0,0 +1,63 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from evaluation.test_queries import test_queries
+from utils.artifacts import artifact_paths
+from utils.filter_index import intent_row_mask, load_filter_index
+from utils.local_intent import LOCAL_INTENT_MIN_CONFIDENCE, parse_intent
+from utils.openai_intent import request_structured_intent
+
+def filter_agreement(filter_index, intent_a, intent_b):
+    """
+    Jaccard similarity of the catalog rows selected by two intents' filters.
+    Args:
+        filter_index (dict): Filter index.
+        intent_a (dict): First intent.
+        intent_b (dict): Second intent.
+    Returns:
+        float: |A & B| / |A | B| (1.0 when both select nothing).
+    """
+    a, b = intent_row_mask(filter_index, intent_a), intent_row_mask(filter_index, intent_b)
+    union = np.count_nonzero(a | b)
+    return np.count_nonzero(a & b) / union if union else 1.0
+
+def benchmark_local_intent(test_queries, filter_index, use_llm=True):
+    """
+    Compares the local intent parser with the LLM on the evaluation queries.
+    Args:
+        test_queries (list): Test queries (dicts with a "query" key).
+        filter_index (dict): Filter index.
+        use_llm (bool): Also call the LLM to measure its latency and filter agreement.
+    Returns:
+        pd.DataFrame: Per-query confidence, latencies and agreement.
+    """
+    rows = []
+    for test in test_queries:
+        query = test["query"]
+        start = time.perf_counter()
+        local_intent, confidence = parse_intent(query, filter_index)
+        row = {"query": query, "confidence": confidence,
+               "skips_llm": confidence >= LOCAL_INTENT_MIN_CONFIDENCE,
+               "local_ms": (time.perf_counter() - start) * 1000}
+
+        if use_llm:
+            start = time.perf_counter()
+            llm_intent = request_structured_intent(query)
+            row["llm_ms"] = (time.perf_counter() - start) * 1000
+            row["filter_agreement"] = filter_agreement(filter_index, local_intent, llm_intent) if llm_intent else None
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    filter_index = load_filter_index(artifact_paths()['filter_index'])
+    results = benchmark_local_intent(test_queries, filter_index, use_llm=bool(os.getenv("OPENAI_API_KEY")))
+
+    print(results.to_string(index=False))
+    print(f"\nQueries skipping the LLM: {results['skips_llm'].mean():.0%}")
+    print(f"Local parser latency p50: {results['local_ms'].median():.3f} ms")
+    if "llm_ms" in results:
+        skipped = results[results['skips_llm']]
+        print(f"LLM latency p50: {results['llm_ms'].median():.0f} ms")
+        print(f"Filter agreement with LLM (all / skipped): "
+              f"{results['filter_agreement'].mean():.2f} / {skipped['filter_agreement'].mean():.2f}")
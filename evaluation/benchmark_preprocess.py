@@ -0,0 +1,118 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from utils.preprocess import DEFAULT_CHUNK_ROWS, iter_preprocessed_netflix_data, preprocess_netflix_data
+
+def legacy_preprocess(file_path):
+    """
+    The previous pipeline: duration extracted twice with regexes and labelled with a Python call per row.
+    """
+    def categorize_duration(row):
+        if row['type'] == 'Movie':
+            if row['duration_cleaned'] < 60:
+                return "very short movie"
+            elif row['duration_cleaned'] < 120:
+                return "short movie"
+            else:
+                return "long movie"
+        elif row['type'] == 'TV Show':
+            if row['duration_cleaned'] == 1:
+                return "one season show"
+            elif row['duration_cleaned'] > 1:
+                return "multi-season show"
+        return "unknown"
+
+    df = pd.read_csv(file_path)
+    df.set_index('show_id', inplace=True)
+    for col in ["director", "cast", "country"]:
+        df[col] = df[col].fillna("Unknown").astype(str)
+    df['date_added'] = pd.to_datetime(df['date_added'], format='%B %d, %Y', errors='coerce')
+    df['year_added'] = df['date_added'].dt.year.fillna(0).astype(int)
+    df['month_added'] = df['date_added'].dt.month.fillna(0).astype(int)
+
+    df['duration_cleaned'] = df['duration'].str.extract(r'(\d+)').astype(float)
+    duration_like_rating = df['rating'].str.contains(r'(?:min|Season)', na=False)
+    df.loc[duration_like_rating, 'duration_cleaned'] = (
+        df.loc[duration_like_rating, 'rating'].str.extract(r'(\d+)').squeeze().astype(float)
+    )
+    df.loc[duration_like_rating, 'rating'] = "Unrated"
+    df.drop(columns=['duration'], inplace=True)
+
+    movie_mean = round(df.loc[df['type'] == 'Movie', 'duration_cleaned'].mean(), 2)
+    df.loc[(df['type'] == 'Movie') & df['duration_cleaned'].isna(), 'duration_cleaned'] = movie_mean
+    tv_median = round(df.loc[df['type'] == 'TV Show', 'duration_cleaned'].median(), 2)
+    df.loc[(df['type'] == 'TV Show') & df['duration_cleaned'].isna(), 'duration_cleaned'] = tv_median
+
+    df['duration_label'] = df.apply(categorize_duration, axis=1)
+    df['rating'] = df['rating'].fillna('Unrated').str.strip().str.upper()
+    df['embedding_input'] = (
+        df['title'] + '. ' + df['description'] + '. ' + df['listed_in'] + '. ' + df['cast'] + '. ' +
+        df['director'] + '. ' + df['country'] + '. ' + df['type'] + '. ' + df['release_year'].astype(str) + '. ' +
+        df['rating'] + '. ' + df['duration_cleaned'].astype(str) + '. ' + df['duration_label']
+    )
+    return df
+
+def streamed_preprocess(file_path, chunksize=DEFAULT_CHUNK_ROWS):
+    return pd.concat(iter_preprocessed_netflix_data(file_path, chunksize))
+
+def drain_stream(file_path, chunksize=DEFAULT_CHUNK_ROWS):
+    """
+    Consumes the stream without keeping chunks, as the index build does once they are embedded.
+    """
+    rows = 0
+    for chunk in iter_preprocessed_netflix_data(file_path, chunksize):
+        rows += len(chunk)
+    return rows
+
+def scaled_csv(file_path, copies):
+    """
+    Writes the catalog repeated `copies` times, with unique show_ids, to a temporary CSV.
+    """
+    df = pd.read_csv(file_path)
+    scaled = pd.concat([df.assign(show_id=df['show_id'] + f"-{copy}") for copy in range(copies)])
+    handle, path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    scaled.to_csv(path, index=False)
+    return path
+
+def measure(fn, *args):
+    """
+    Returns (result, seconds, peak traced memory in MB); the timing is a separate untraced run.
+    """
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the vectorized and streaming preprocessing with the previous pipeline.")
+    parser.add_argument("--csv", default="./data/netflix_titles.csv")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--scale", type=int, default=1, help="Repeat the catalog this many times for the timing")
+    args = parser.parse_args()
+
+    # Equality on the real catalog: all three pipelines must produce the same frame
+    legacy = legacy_preprocess(args.csv)
+    pd.testing.assert_frame_equal(preprocess_netflix_data(args.csv), legacy)
+    pd.testing.assert_frame_equal(streamed_preprocess(args.csv, min(args.chunksize, 1000)), legacy)
+    print(f"Vectorized and streamed (1000-row chunks) output equal the previous pipeline on {len(legacy)} rows")
+
+    path = scaled_csv(args.csv, args.scale) if args.scale > 1 else args.csv
+    try:
+        runs = [("previous", legacy_preprocess), ("vectorized", preprocess_netflix_data), ("streamed", drain_stream)]
+        for name, fn in runs:
+            args_ = (path, args.chunksize) if fn is drain_stream else (path,)
+            result, seconds, peak_mb = measure(fn, *args_)
+            rows = result if isinstance(result, int) else len(result)
+            print(f"{name:>10}: {rows} rows in {seconds:.2f}s ({rows / seconds:,.0f} rows/s), peak {peak_mb:.0f} MB")
+    finally:
+        if path != args.csv:
+            os.unlink(path)
@@ -0,0 +1,100 @@
+import argparse
+import glob
+import os
+import time
+import numpy as np
+import speech_recognition as sr
+from evaluation.benchmark_transcription import synthetic_wav
+from utils.audio import TARGET_RATE, decode_audio
+import utils.transcription as transcription
+
+def load_fixtures(folder):
+    """
+    Loads WAV fixtures as 16 kHz mono PCM, with reference transcripts from sidecar .txt files.
+    Args:
+        folder (str): Directory of .wav files (clip.wav may have a clip.txt transcript next to it).
+    Returns:
+        list: (name, pcm, reference transcript or None) tuples.
+    """
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.wav"))):
+        with open(path, 'rb') as f:
+            pcm = decode_audio(f.read())
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        reference = open(reference_path).read().strip() if os.path.exists(reference_path) else None
+        fixtures.append((os.path.basename(path), pcm, reference))
+    return fixtures
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level edit distance divided by the reference length.
+    """
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    distances = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, distances[0] = distances[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, distances[j] = distances[j], min(distances[j] + 1, distances[j - 1] + 1,
+                                                       previous + (ref_word != hyp_word))
+    return distances[-1] / max(len(ref), 1)
+
+def _transcribe_or_empty(pcm):
+    try:
+        return transcription.transcribe(pcm, TARGET_RATE)
+    except sr.UnknownValueError:
+        return ""
+
+def benchmark_backend(backend, fixtures, workers):
+    """
+    Measures per-clip latency in-process and clip throughput through a process pool.
+    Args:
+        backend (str): Transcription backend.
+        fixtures (list): Output of load_fixtures().
+        workers (int): Pool size for the throughput run.
+    Returns:
+        dict: Latency percentiles (ms), real-time factor, clips/sec with the pool, and WER if references exist.
+    """
+    transcription.TRANSCRIPTION_BACKEND = backend
+    transcription._transcriber = transcription.load_transcriber(backend)
+    transcription.transcription_pool = None
+
+    latencies, audio_seconds, errors = [], 0.0, []
+    for _, pcm, reference in fixtures:
+        start = time.perf_counter()
+        text = _transcribe_or_empty(pcm)
+        latencies.append(time.perf_counter() - start)
+        audio_seconds += len(pcm) / TARGET_RATE
+        if reference is not None:
+            errors.append(word_error_rate(reference, text))
+
+    pool = transcription.enable_transcription_pool(workers=workers, backend=backend)
+    list(pool.map(_transcribe_or_empty, [pcm for _, pcm, _ in fixtures[:workers]]))  # Load models
+    start = time.perf_counter()
+    list(pool.map(_transcribe_or_empty, [pcm for _, pcm, _ in fixtures]))
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    transcription.transcription_pool = None
+
+    result = {'latency_ms_p50': float(np.percentile(latencies, 50)) * 1000,
+              'latency_ms_p95': float(np.percentile(latencies, 95)) * 1000,
+              'real_time_factor': sum(latencies) / audio_seconds,
+              f'pool{workers}_clips_per_sec': len(fixtures) / elapsed}
+    if errors:
+        result['wer'] = float(np.mean(errors))
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark speech-to-text backends on WAV fixtures.")
+    parser.add_argument("backends", nargs="*", default=["stub"])
+    parser.add_argument("--fixtures", default="evaluation/audio_fixtures")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No WAV fixtures in {args.fixtures}; using synthetic tones (latency only).")
+        fixtures = [(f"tone-{i}", decode_audio(synthetic_wav(seconds=2 + i % 4)), None) for i in range(16)]
+
+    for backend in args.backends:
+        result = benchmark_backend(backend, fixtures, args.workers)
+        print(backend, {k: round(v, 4) for k, v in result.items()})
@@ -0,0 +1,102 @@
+import base64
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+import numpy as np
+import speech_recognition as sr
+from pydub import AudioSegment
+from utils.audio import decode_audio, to_audio_data
+
+def synthetic_wav(seconds=5, rate=48000, channels=2):
+    """
+    Builds a WAV clip shaped like browser recordings (48 kHz stereo) for when no fixture is given.
+    """
+    t = np.arange(int(seconds * rate)) / rate
+    tone = (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.repeat(tone[:, None], channels, axis=1).tobytes())
+    return buffer.getvalue()
+
+def legacy_decode(payload, fmt):
+    """
+    The previous /api/transcribe path: base64 JSON -> temp file -> pydub -> temp WAV -> AudioFile.
+    """
+    audio_bytes = base64.b64decode(json.loads(payload)['audio'].split(',')[1])
+    with tempfile.NamedTemporaryFile(suffix=f'.{fmt}', delete=False) as temp_input:
+        temp_input.write(audio_bytes)
+        temp_input_path = temp_input.name
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_output:
+        temp_output_path = temp_output.name
+    try:
+        audio = AudioSegment.from_file(temp_input_path, format=fmt)
+        audio = audio.set_frame_rate(16000).set_channels(1)
+        audio.export(temp_output_path, format="wav")
+        with sr.AudioFile(temp_output_path) as source:
+            return sr.Recognizer().record(source)
+    finally:
+        os.unlink(temp_input_path)
+        os.unlink(temp_output_path)
+
+def streaming_decode(payload, chunk_bytes=64 * 1024):
+    """
+    The /api/transcribe/stream path: raw body read in chunks and decoded in memory.
+    """
+    chunks = (payload[i:i + chunk_bytes] for i in range(0, len(payload), chunk_bytes))
+    return to_audio_data(decode_audio(chunks))
+
+def time_ms(fn, *args, repeats=20):
+    fn(*args)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 95))
+
+def benchmark_transcription(audio_bytes, fmt, repeats=20):
+    """
+    Compares request size and decode latency of the legacy and streaming transcription paths.
+    Recognition itself is excluded, since it is identical for both paths.
+    Args:
+        audio_bytes (bytes): Encoded audio clip.
+        fmt (str): Container format of the clip (e.g. "webm", "wav").
+        repeats (int): Timed runs per path.
+    Returns:
+        dict: Payload sizes (bytes) and decode latency percentiles (ms) for each path.
+    """
+    mime = f"audio/{fmt}"
+    legacy_payload = json.dumps({'audio': f"data:{mime};base64," + base64.b64encode(audio_bytes).decode()})
+    legacy = time_ms(legacy_decode, legacy_payload, fmt, repeats=repeats)
+    streaming = time_ms(streaming_decode, audio_bytes, repeats=repeats)
+
+    legacy_audio, streaming_audio = legacy_decode(legacy_payload, fmt), streaming_decode(audio_bytes)
+    return {
+        'legacy_payload_bytes': len(legacy_payload), 'stream_payload_bytes': len(audio_bytes),
+        'legacy_ms_p50': legacy[0], 'legacy_ms_p95': legacy[1],
+        'stream_ms_p50': streaming[0], 'stream_ms_p95': streaming[1],
+        'legacy_seconds': len(legacy_audio.frame_data) / 2 / legacy_audio.sample_rate,
+        'stream_seconds': len(streaming_audio.frame_data) / 2 / streaming_audio.sample_rate,
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+        with open(path, 'rb') as f:
+            audio_bytes = f.read()
+        fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    else:
+        audio_bytes, fmt = synthetic_wav(), 'wav'
+
+    results = benchmark_transcription(audio_bytes, fmt)
+    for key, value in results.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    print(f"Payload reduction: {1 - results['stream_payload_bytes'] / results['legacy_payload_bytes']:.0%}")
+    print(f"Decode speedup (p50): {results['legacy_ms_p50'] / results['stream_ms_p50']:.1f}x")
@@ -2,7 +2,7 @@ from nltk.stem import WordNetLemmatizer
 import re
 import pandas as pd
 from utils.openai_intent import extract_structured_intent
-from utils.search import search_with_intent
+from utils.search import search_many
 from utils.faiss_io import load_faiss_index, load_id_map
 
 # Download wordnet resource
@@ -41,7 +41,7 @@ def keyword_match_score(results, expected_keywords):
 
     return hits
 
-def evaluate_model(test_queries, index, id_map, top_k=5):
+def evaluate_model(test_queries, index, id_map, top_k=5, filter_index=None, embeddings=None, text_index=None):
     """
     Evaluates the model's performance on a set of test queries.
     Args:
@@ -49,17 +49,24 @@ def evaluate_model(test_queries, index, id_map, top_k=5):
         index (faiss.Index): FAISS index for searching.
         id_map (pd.DataFrame): ID map DataFrame for mapping search results.
         top_k (int): Number of top results to consider for evaluation.
+        filter_index (dict, optional): Prebuilt filter index for id_map.
+        embeddings (np.ndarray, optional): Catalog embedding matrix row-aligned with id_map.
+        text_index (dict, optional): BM25 text index for id_map; evaluates hybrid search.
     Returns:
         pd.DataFrame: DataFrame containing evaluation summary for each test query.
     """
     summary = []
 
-    for test in test_queries:
+    # Search all queries as one batch; wait for every intent (deadline 0) so the metrics
+    # do not depend on how fast the LLM answered this run
+    all_results = search_many([test["query"] for test in test_queries], index, id_map, top_k=top_k,
+                              filter_index=filter_index, embeddings=embeddings,
+                              intent_deadline_ms=0, text_index=text_index)
+
+    for test, results in zip(test_queries, all_results):
         query = test["query"]
         expected = test["expected_keywords"]
 
-        # Pass index and id_map into search
-        results = search_with_intent(query, index, id_map, top_k=top_k)
         hits = keyword_match_score(results, expected)
         hit_count = sum(hits)
         hit_rate = hit_count / top_k
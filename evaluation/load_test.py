@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from evaluation.test_queries import test_queries
+
+def post_search(url, query):
+    """
+    Sends one search request.
+    Args:
+        url (str): Search endpoint URL.
+        query (str): Query text.
+    Returns:
+        tuple: (latency in ms, whether the request succeeded).
+    """
+    body = json.dumps({'query': query}).encode()
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            ok = response.status == 200
+            response.read()
+    except Exception:
+        ok = False
+    return (time.perf_counter() - start) * 1000, ok
+
+def run_load_test(url, queries, concurrency=16, duration=30):
+    """
+    Keeps `concurrency` requests in flight against the search endpoint for `duration` seconds.
+    Args:
+        url (str): Search endpoint URL.
+        queries (list of str): Queries sent round-robin.
+        concurrency (int): Number of concurrent clients.
+        duration (float): Test length in seconds.
+    Returns:
+        dict: Request rate, error count and latency percentiles.
+    """
+    stop_at = time.monotonic() + duration
+
+    def client(offset):
+        samples, i = [], offset
+        while time.monotonic() < stop_at:
+            samples.append(post_search(url, queries[i % len(queries)]))
+            i += 1
+        return samples
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = [s for result in pool.map(client, range(concurrency)) for s in result]
+    elapsed = time.monotonic() - started
+
+    latencies = np.array([ms for ms, ok in samples if ok])
+    return {
+        'requests': len(samples),
+        'errors': sum(not ok for _, ok in samples),
+        'requests_per_sec': len(latencies) / elapsed,
+        'latency_ms_p50': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'latency_ms_p95': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'latency_ms_p99': float(np.percentile(latencies, 99)) if len(latencies) else None,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /api/search and report requests/sec per core.")
+    parser.add_argument('--url', default='http://localhost:5000/api/search')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--cores', type=int, default=os.cpu_count(), help="Cores given to the server")
+    parser.add_argument('--queries-file', help="Queries to send, one per line (default: the evaluation queries)")
+    args = parser.parse_args()
+
+    if args.queries_file:
+        with open(args.queries_file) as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = [t["query"] for t in test_queries]
+    stats = run_load_test(args.url, queries, args.concurrency, args.duration)
+    stats['requests_per_sec_per_core'] = stats['requests_per_sec'] / args.cores
+    for key, value in stats.items():
+        print(f"{key}: {round(value, 2) if isinstance(value, float) else value}")
@@ -0,0 +1,6 @@
+from utils.embeddings import MODEL_NAME, ONNX_MODEL_DIR
+from utils.onnx_embeddings import export_onnx_model
+
+export_onnx_model(MODEL_NAME, ONNX_MODEL_DIR, quantize=True)
+
+print(f"ONNX model and int8 quantized model saved to {ONNX_MODEL_DIR}.")
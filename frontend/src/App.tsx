@@ -1,7 +1,7 @@
 import React, { useRef, useState } from 'react'
 import { Loader2, Search } from 'lucide-react'
 import MovieCard from './components/MovieCard'
-import { searchMovies, transcribeAudio } from './api'
+import { searchMovies, startVoiceSearch } from './api'
 
 const App: React.FC = () => {
   const [query, setQuery] = useState('')
@@ -10,7 +10,6 @@ const App: React.FC = () => {
   const [error, setError] = useState('')
   const [isRecording, setIsRecording] = useState(false)
   const mediaRecorderRef = useRef<MediaRecorder | null>(null)
-  const audioChunks = useRef<Blob[]>([])
 
   const handleInputChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     setQuery(e.target.value)
@@ -41,34 +40,37 @@ const App: React.FC = () => {
     }
     setError('')
     setIsRecording(true)
-    audioChunks.current = []
     try {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true })
       const mediaRecorder = new window.MediaRecorder(stream, {
         mimeType: 'audio/webm;codecs=opus'
       })
       mediaRecorderRef.current = mediaRecorder
+      // Speculative results are shown as they arrive and replaced by the final ones
+      const upload = startVoiceSearch('audio/webm', event => {
+        if (event.type === 'error') {
+          setError('Could not transcribe audio')
+          return
+        }
+        setQuery(event.transcription ?? '')
+        setResults(event.movies ?? [])
+        if (event.type === 'final') setLoading(false)
+      })
       mediaRecorder.ondataavailable = (e) => {
-        audioChunks.current.push(e.data)
+        if (e.data.size) upload.push(e.data)
       }
       mediaRecorder.onstop = async () => {
-        const audioBlob = new Blob(audioChunks.current, { type: 'audio/webm' })
-        const reader = new FileReader()
-        reader.onloadend = async () => {
-          const base64Audio = reader.result as string
-          setLoading(true)
-          try {
-            const transcription = await transcribeAudio(base64Audio)
-            setQuery(transcription)
-            await handleSearch(transcription)
-          } catch {
-            setError('Could not transcribe audio')
-          }
-          setLoading(false)
+        upload.close()
+        setLoading(true)
+        try {
+          await upload.done
+        } catch {
+          setError('Could not transcribe audio')
         }
-        reader.readAsDataURL(audioBlob)
+        setLoading(false)
       }
-      mediaRecorder.start()
+      // Emit a chunk every 250 ms so it is uploaded and decoded while the user speaks
+      mediaRecorder.start(250)
       setTimeout(() => {
         if (mediaRecorder.state !== 'inactive') {
           mediaRecorder.stop()
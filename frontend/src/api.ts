@@ -7,7 +7,93 @@ export const searchMovies = async (query: string) => {
   return res.data.movies
 }
 
-export const transcribeAudio = async (audio: string) => {
-  const res = await axios.post(`${API_BASE}/transcribe`, { audio })
-  return res.data.transcription
-} 
\ No newline at end of file
+export type VoiceSearchEvent = {
+  type: 'partial' | 'final' | 'error'
+  transcription?: string
+  movies?: any[]
+  error?: string
+}
+
+// Browsers that can send a ReadableStream as a request body (Chromium over HTTP/2)
+const supportsRequestStreams = (() => {
+  let duplexAccessed = false
+  const hasContentType = new Request('http://localhost', {
+    body: new ReadableStream(),
+    method: 'POST',
+    get duplex() {
+      duplexAccessed = true
+      return 'half'
+    }
+  } as RequestInit).headers.has('Content-Type')
+  return duplexAccessed && !hasContentType
+})()
+
+export type VoiceUpload = {
+  push: (chunk: Blob) => void
+  close: () => void
+  done: Promise<void>
+}
+
+// Uploads recorder chunks to /transcribe/search while recording, so the server decodes and
+// transcribes as the user speaks, and streams its NDJSON events: speculative results for partial
+// transcripts, then the final results. Where request streams are unsupported the chunks are sent
+// as one body after close().
+export const startVoiceSearch = (contentType: string, onEvent: (event: VoiceSearchEvent) => void): VoiceUpload => {
+  const chunks: Blob[] = []
+  let controller: ReadableStreamDefaultController<Uint8Array> | null = null
+  let written = Promise.resolve()
+  let markClosed = () => {}
+  const closed = new Promise<void>(resolve => { markClosed = resolve })
+
+  const post = (body: BodyInit) => fetch(`${API_BASE}/transcribe/search`, {
+    method: 'POST',
+    headers: { 'Content-Type': contentType },
+    body,
+    duplex: 'half'
+  } as RequestInit)
+
+  const streamed = supportsRequestStreams
+    ? post(new ReadableStream<Uint8Array>({ start: c => { controller = c } }))
+    : null
+
+  const push = (chunk: Blob) => {
+    chunks.push(chunk)
+    // Chained so chunks are enqueued in recording order
+    // (errors are ignored: a failed streamed upload is retried from chunks as one body)
+    written = written
+      .then(async () => controller?.enqueue(new Uint8Array(await chunk.arrayBuffer())))
+      .catch(() => {})
+  }
+
+  const close = () => {
+    written = written.then(() => controller?.close()).catch(() => {})
+    markClosed()
+  }
+
+  const done = (async () => {
+    let res: Response
+    try {
+      if (!streamed) throw new Error('Request streams are not supported')
+      res = await streamed
+    } catch {
+      // e.g. HTTP/1.1 servers, where Chromium refuses streamed uploads
+      await closed
+      res = await post(new Blob(chunks, { type: contentType }))
+    }
+    if (!res.ok || !res.body) throw new Error(`Voice search failed: ${res.status}`)
+    const reader = res.body.getReader()
+    const decoder = new TextDecoder()
+    let buffered = ''
+    for (;;) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffered += decoder.decode(value, { stream: true })
+      const lines = buffered.split('\n')
+      buffered = lines.pop() ?? ''
+      lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)))
+    }
+    if (buffered.trim()) onEvent(JSON.parse(buffered))
+  })()
+
+  return { push, close, done }
+}
@@ -0,0 +1,26 @@
+# Production server settings: gunicorn -c gunicorn.conf.py
+# Loads the index, catalog and model once in the master (preload_app) and forks
+# workers that share those pages copy-on-write.
+import multiprocessing
+import os
+
+# One intra-op thread per worker process; scale with workers instead of oversubscribing cores.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+wsgi_app = "api:create_app()"
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+preload_app = True
+timeout = 60
+
+def when_ready(server):
+    # Per-host process and thread count: every worker has its own pools
+    intent_threads = int(os.getenv("INTENT_WORKERS", "16"))
+    transcribers = int(os.getenv("TRANSCRIPTION_WORKERS", "2"))
+    server.log.info(f"{workers} workers x ({threads} request threads + up to {intent_threads} intent threads); "
+                    f"up to {workers * transcribers} transcription processes")
+
+def post_fork(server, worker):
+    import api
+    api.init_worker()
@@ -1,17 +1,50 @@
 from evaluation.evaluate import evaluate_model
 from evaluation.test_queries import test_queries
-from utils.faiss_io import load_faiss_index, load_id_map
+from utils.faiss_io import load_faiss_index, load_id_map, load_embeddings
+from utils.filter_index import load_filter_index
+from utils.artifacts import artifact_paths
+from utils.text_index import bm25_rows, load_text_index
+import numpy as np
+import os
+import time
 import pandas as pd
 
 if __name__ == "__main__":
-    # Step 1: Load the index and id_map
-    index = load_faiss_index("./models/netflix_faiss.index")
-    id_map = load_id_map("./models/id_map.pkl")
+    # Step 1: Load the index, id_map, filter index and (for releases that have one) text index
+    paths = artifact_paths()
+    index = load_faiss_index(paths['index'])
+    id_map = load_id_map(paths['catalog'])
+    embeddings = load_embeddings(paths['catalog'])
+    filter_index = load_filter_index(paths['filter_index'])
+    text_index = load_text_index(paths['text_index']) if os.path.exists(paths['text_index']) else None
 
-    # Step 2: Run evaluation on test queries
-    eval_df = evaluate_model(test_queries, index, id_map, top_k=5)
+    # Step 2: Run evaluation on test queries, embedding-only and hybrid (fused with BM25)
+    eval_df = evaluate_model(test_queries, index, id_map, top_k=5, filter_index=filter_index,
+                             embeddings=embeddings)
+    if text_index is not None:
+        hybrid_df = evaluate_model(test_queries, index, id_map, top_k=5, filter_index=filter_index,
+                                   embeddings=embeddings, text_index=text_index)
 
     # Step 3: Save and display results
     eval_df.to_csv("./evaluation/intent_based_query_results.csv", index=False)
     print("\nSample Evaluation Results:")
     print(eval_df[['query', 'hit_rate', 'hit_count']].head())
+
+    if text_index is not None:
+        hybrid_df.to_csv("./evaluation/hybrid_query_results.csv", index=False)
+        latencies = []
+        for test in test_queries:
+            start = time.perf_counter()
+            bm25_rows(text_index, test["query"], 50)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        change = pd.DataFrame({'query': eval_df['query'], 'embedding': eval_df['hit_rate'],
+                               'hybrid': hybrid_df['hit_rate']})
+        changed = change[change['embedding'] != change['hybrid']]
+        print(f"\nMean hit rate: embedding-only {change['embedding'].mean():.3f}, "
+              f"hybrid {change['hybrid'].mean():.3f} ({len(changed)} of {len(change)} queries changed)")
+        print(changed.to_string(index=False))
+        print(f"BM25 top-50 latency: p50 {np.percentile(latencies, 50):.2f} ms, "
+              f"p95 {np.percentile(latencies, 95):.2f} ms")
+    else:
+        print("\nNo text index in this release; rebuild with build_index.py to compare hybrid search.")
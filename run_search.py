@@ -1,14 +1,26 @@
-from utils.faiss_io import load_faiss_index, load_id_map
-from utils.search import search_with_intent
-from voice.capture_and_transcribe import capture_and_transcribe
+import os
+from utils.faiss_io import load_faiss_index, load_id_map, load_embeddings
+from utils.filter_index import load_filter_index
+from utils.artifacts import artifact_paths
+from utils.search import HYBRID_SEARCH
+from utils.text_index import load_text_index
+from voice.capture_and_transcribe import capture_and_search
 
-index = load_faiss_index("models/netflix_faiss.index")
-id_map = load_id_map("models/id_map.pkl")
+paths = artifact_paths()
+index = load_faiss_index(paths['index'])
+id_map = load_id_map(paths['catalog'])
+embeddings = load_embeddings(paths['catalog'])
+filter_index = load_filter_index(paths['filter_index'])
+text_index = load_text_index(paths['text_index']) if HYBRID_SEARCH and os.path.exists(paths['text_index']) else None
+
+def show_results(query, results, final):
+    if final:
+        print("You said:", query)
+        print(results[['title', 'listed_in', 'duration_cleaned', 'description']])
+    else:
+        print(f"... {query}: {', '.join(results['title'])}")
 
 # query = "I'm curious about the psychology behind murderers. Got anything like that?"
 # Is there a documentary on cults or strange communities?
-query = capture_and_transcribe()
-print("You said:", query)
-
-results = search_with_intent(query, index, id_map)
-print(results[['title', 'listed_in', 'duration_cleaned', 'description']])
+capture_and_search(index, id_map, filter_index=filter_index, embeddings=embeddings, on_results=show_results,
+                   text_index=text_index)
@@ -0,0 +1,141 @@
+import os
+import shutil
+import time
+from collections import namedtuple
+import numpy as np
+
+# Builds are written to MODELS_DIR/releases/<version>/ and published by atomically
+# repointing the MODELS_DIR/current symlink, so readers never see a half-written set.
+MODELS_DIR = os.getenv("MODELS_DIR", "models")
+INDEX_FILE = 'netflix_faiss.index'
+CATALOG_DIR = 'catalog'
+FILTER_INDEX_FILE = 'filter_index.npz'
+TEXT_INDEX_FILE = 'text_index.npz'
+KEEP_RELEASES = int(os.getenv("KEEP_RELEASES", "3"))
+
+def current_release_dir(models_dir=MODELS_DIR):
+    """
+    Returns the directory holding the published artifacts: MODELS_DIR/current, or MODELS_DIR
+    itself for artifacts built before releases were introduced.
+    """
+    current = os.path.join(models_dir, 'current')
+    return current if os.path.exists(current) else models_dir
+
+def release_version(release_dir):
+    """
+    Returns the version name of a release directory (the resolved directory name).
+    """
+    return os.path.basename(os.path.realpath(release_dir))
+
+def artifact_paths(release_dir=None):
+    """
+    Paths of the artifacts in a release directory.
+    Args:
+        release_dir (str, optional): Release directory; defaults to the published one.
+    Returns:
+        dict: 'index', 'catalog', 'filter_index' and 'text_index' paths.
+    """
+    release_dir = release_dir or current_release_dir()
+    return {
+        'index': os.path.join(release_dir, INDEX_FILE),
+        'catalog': os.path.join(release_dir, CATALOG_DIR),
+        'filter_index': os.path.join(release_dir, FILTER_INDEX_FILE),
+        'text_index': os.path.join(release_dir, TEXT_INDEX_FILE),
+    }
+
+def new_release_dir(models_dir=MODELS_DIR):
+    """
+    Creates an empty directory for the next release, named by UTC build time.
+    """
+    version = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+    path = os.path.join(models_dir, 'releases', version)
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(models_dir, 'releases', f"{version}-{suffix}")
+        suffix += 1
+    os.makedirs(path)
+    return path
+
+def publish_release(release_dir, models_dir=MODELS_DIR, keep=KEEP_RELEASES):
+    """
+    Makes a release current by atomically replacing the MODELS_DIR/current symlink, then
+    deletes older releases beyond the newest `keep` (the previous one stays for in-flight readers).
+    Args:
+        release_dir (str): Fully written release directory.
+        models_dir (str): Models directory.
+        keep (int): Number of releases to retain.
+    """
+    current = os.path.join(models_dir, 'current')
+    tmp_link = f"{current}.tmp-{os.getpid()}"
+    os.symlink(os.path.relpath(release_dir, models_dir), tmp_link)
+    os.replace(tmp_link, current)
+
+    releases_dir = os.path.join(models_dir, 'releases')
+    active = os.path.realpath(current)
+    for old in sorted(os.listdir(releases_dir))[:-keep] if keep else []:
+        path = os.path.join(releases_dir, old)
+        if os.path.realpath(path) != active:
+            shutil.rmtree(path, ignore_errors=True)
+
+# Everything a search needs from one release. Servers swap the whole tuple at once, so a
+# request that took a reference keeps a consistent version until it finishes.
+# text_index is None for releases built before the BM25 index existed.
+SearchArtifacts = namedtuple('SearchArtifacts', ['version', 'index', 'id_map', 'embeddings', 'filter_index', 'text_index'],
+                             defaults=(None,))
+
+def load_artifacts(release_dir=None):
+    """
+    Loads the index, catalog, embeddings, filter index and text index of a release.
+    Args:
+        release_dir (str, optional): Release directory; defaults to the published one.
+    Returns:
+        SearchArtifacts: The loaded release.
+    """
+    from utils.faiss_io import load_embeddings, load_faiss_index, load_id_map
+    from utils.filter_index import load_filter_index
+    from utils.text_index import load_text_index
+    release_dir = release_dir or current_release_dir()
+    paths = artifact_paths(release_dir)
+    return SearchArtifacts(
+        version=release_version(release_dir),
+        index=load_faiss_index(paths['index']),
+        id_map=load_id_map(paths['catalog']),
+        embeddings=load_embeddings(paths['catalog']),
+        filter_index=load_filter_index(paths['filter_index']),
+        text_index=load_text_index(paths['text_index']) if os.path.exists(paths['text_index']) else None,
+    )
+
+def validate_artifacts(artifacts, sample=16, k=10):
+    """
+    Checks that a release's pieces agree before it is served: dimensions, row counts, and that
+    searching a sample of catalog vectors returns valid, live ids that include the row itself.
+    Args:
+        artifacts (SearchArtifacts): Loaded release.
+        sample (int): Catalog rows searched for the id check.
+        k (int): Results per sample search.
+    Raises:
+        ValueError: Describing the first inconsistency found.
+    """
+    from utils.faiss_io import search_index
+    index, id_map, embeddings, filter_index = artifacts.index, artifacts.id_map, artifacts.embeddings, artifacts.filter_index
+    num_rows = len(id_map)
+    live = filter_index.get('live', np.ones(num_rows, dtype=bool))
+    if embeddings.shape != (num_rows, index.d):
+        raise ValueError(f"Embeddings {embeddings.shape} do not match {num_rows} catalog rows of dim {index.d}")
+    if filter_index['num_rows'] != num_rows or len(live) != num_rows:
+        raise ValueError(f"Filter index covers {filter_index['num_rows']} rows, catalog has {num_rows}")
+    if artifacts.text_index is not None and artifacts.text_index['num_rows'] != num_rows:
+        raise ValueError(f"Text index covers {artifacts.text_index['num_rows']} rows, catalog has {num_rows}")
+    if index.ntotal != np.count_nonzero(live):
+        raise ValueError(f"Index holds {index.ntotal} vectors for {np.count_nonzero(live)} live catalog rows")
+
+    rows = np.flatnonzero(live)
+    rows = rows[np.linspace(0, len(rows) - 1, min(sample, len(rows))).astype(int)] if len(rows) else rows
+    if len(rows):
+        found = search_index(index, np.ascontiguousarray(embeddings[rows], dtype=np.float32), k, embeddings)
+        returned = found[found >= 0]
+        if (returned >= num_rows).any() or not live[returned].all():
+            raise ValueError("Index returned ids outside the live catalog rows")
+        self_hits = np.mean([row in hits for row, hits in zip(rows, found)])
+        if self_hits < 0.5:
+            raise ValueError(f"Only {self_hits:.0%} of sampled rows find themselves; index and catalog disagree")
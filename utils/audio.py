@@ -0,0 +1,169 @@
+import io
+import subprocess
+import threading
+import wave
+from math import gcd
+import numpy as np
+from scipy.signal import resample_poly
+
+# Sample rate the speech recognizers are fed with.
+TARGET_RATE = 16000
+
+def _as_chunks(audio):
+    """
+    Accepts raw bytes or an iterable of byte chunks.
+    """
+    return [audio] if isinstance(audio, (bytes, bytearray)) else audio
+
+def resample_mono(samples, rate, target_rate=TARGET_RATE):
+    """
+    Downmixes to mono and resamples 16-bit PCM.
+    Args:
+        samples (np.ndarray): int16 samples, shape [frames] or [frames, channels].
+        rate (int): Sample rate of the input.
+        target_rate (int): Output sample rate.
+    Returns:
+        np.ndarray: Mono int16 samples at target_rate.
+    """
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1)
+    if rate != target_rate:
+        factor = gcd(rate, target_rate)
+        samples = resample_poly(samples.astype(np.float32), target_rate // factor, rate // factor)
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+def decode_wav(data, target_rate=TARGET_RATE):
+    """
+    Decodes a PCM WAV file held in memory.
+    Args:
+        data (bytes): WAV file contents.
+        target_rate (int): Output sample rate.
+    Returns:
+        np.ndarray: Mono int16 samples at target_rate.
+    """
+    with wave.open(io.BytesIO(data)) as wav:
+        width, channels, rate = wav.getsampwidth(), wav.getnchannels(), wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype='<i2')
+    elif width == 4:
+        samples = (np.frombuffer(frames, dtype='<i4') >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width} bytes")
+    return resample_mono(samples.reshape(-1, channels), rate, target_rate)
+
+def _ffmpeg_blocks(chunks, target_rate, block_bytes):
+    process = subprocess.Popen(
+        ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0',
+         '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(target_rate), 'pipe:1'],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+    # An upload that fails mid-way must not pass for a complete clip: the writer records the
+    # error and it is raised once ffmpeg has drained what it was given.
+    failures = []
+
+    def feed():
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        except Exception as e:
+            failures.append(e)
+        finally:
+            process.stdin.close()
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+        while True:
+            block = process.stdout.read(block_bytes)
+            if not block:
+                break
+            yield np.frombuffer(block, dtype=np.int16)
+        errors = process.stderr.read()
+        process.wait()
+        writer.join()
+        if failures:
+            raise failures[0]
+        if process.returncode != 0:
+            raise ValueError(f"Could not decode audio: {errors.decode(errors='ignore').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+def decode_with_ffmpeg(chunks, target_rate=TARGET_RATE):
+    """
+    Decodes compressed audio (webm/opus, ogg, mp3, ...) through ffmpeg pipes, without temp files.
+    Chunks are written to ffmpeg while it decodes, so decoding overlaps with the upload.
+    Args:
+        chunks (iterable of bytes): Encoded audio.
+        target_rate (int): Output sample rate.
+    Returns:
+        np.ndarray: Mono int16 samples at target_rate.
+    """
+    blocks = list(_ffmpeg_blocks(chunks, target_rate, 1 << 20))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int16)
+
+def decode_audio(audio, target_rate=TARGET_RATE):
+    """
+    Decodes an audio clip in memory to 16 kHz mono PCM.
+    WAV is decoded in-process; other containers go through a single ffmpeg pipe.
+    Args:
+        audio (bytes or iterable of bytes): Encoded audio, whole or as chunks.
+        target_rate (int): Output sample rate.
+    Returns:
+        np.ndarray: Mono int16 samples at target_rate.
+    """
+    chunks = iter(_as_chunks(audio))
+    first = next(chunks, b'')
+    if not first:
+        return np.zeros(0, dtype=np.int16)
+    if first[:4] == b'RIFF' and first[8:12] == b'WAVE':
+        return decode_wav(b''.join([first, *chunks]), target_rate)
+
+    def all_chunks():
+        yield first
+        yield from chunks
+    return decode_with_ffmpeg(all_chunks(), target_rate)
+
+def stream_decode(audio, target_rate=TARGET_RATE, block_ms=100):
+    """
+    Decodes audio incrementally, yielding PCM blocks as soon as the decoder produces them.
+    Args:
+        audio (bytes or iterable of bytes): Encoded audio, whole or as chunks.
+        target_rate (int): Output sample rate.
+        block_ms (int): Duration of each yielded block.
+    Yields:
+        np.ndarray: Mono int16 blocks at target_rate (the last one may be shorter).
+    """
+    block_samples = int(target_rate * block_ms / 1000)
+    chunks = iter(_as_chunks(audio))
+    first = next(chunks, b'')
+    if not first:
+        return
+    if first[:4] == b'RIFF' and first[8:12] == b'WAVE':
+        pcm = decode_wav(b''.join([first, *chunks]), target_rate)
+        for i in range(0, len(pcm), block_samples):
+            yield pcm[i:i + block_samples]
+        return
+
+    def all_chunks():
+        yield first
+        yield from chunks
+    yield from _ffmpeg_blocks(all_chunks(), target_rate, 2 * block_samples)
+
+def to_audio_data(pcm, rate=TARGET_RATE):
+    """
+    Wraps PCM samples for speech_recognition without writing a WAV file.
+    Args:
+        pcm (np.ndarray): Mono int16 samples.
+        rate (int): Sample rate.
+    Returns:
+        speech_recognition.AudioData: Audio the recognizers accept.
+    """
+    import speech_recognition as sr
+    return sr.AudioData(np.ascontiguousarray(pcm, dtype=np.int16).tobytes(), rate, 2)
@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls into batches processed by a single worker thread.
+    The first queued item opens a batch, which is run as soon as it holds max_batch_size
+    items or max_wait_ms has passed, whichever comes first.
+    Args:
+        fn (callable): Function mapping a list of inputs to a list of outputs in the same order.
+        max_batch_size (int): Largest batch passed to fn.
+        max_wait_ms (float): Longest time an item waits for other items to join its batch.
+        name (str): Name of the worker thread.
+    """
+
+    def __init__(self, fn, max_batch_size=32, max_wait_ms=5, name='micro-batcher'):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._items = self._batches = 0
+        self._run_seconds = 0.0
+        self._queue_waits = deque(maxlen=2048)
+        self._batch_sizes = deque(maxlen=2048)
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """
+        Queues an item for the next batch.
+        Args:
+            item: Input for fn.
+        Returns:
+            concurrent.futures.Future: Resolves to fn's output for the item.
+        """
+        future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """
+        Queues an item and waits for its result.
+        """
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            try:
+                outputs = self.fn([item for item, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                outputs = None
+            finished = time.monotonic()
+
+            if outputs is not None:
+                for (_, future, _), output in zip(batch, outputs):
+                    future.set_result(output)
+
+            with self._lock:
+                self._items += len(batch)
+                self._batches += 1
+                self._run_seconds += finished - started
+                self._batch_sizes.append(len(batch))
+                self._queue_waits.extend(started - queued_at for _, _, queued_at in batch)
+
+    def stats(self):
+        """
+        Returns throughput, batch size and queueing latency metrics.
+        Latency percentiles are computed over the most recent items.
+        """
+        with self._lock:
+            waits_ms = np.array(self._queue_waits) * 1000
+            elapsed = time.monotonic() - self._started_at
+            return {
+                'items': self._items,
+                'batches': self._batches,
+                'queued': self._queue.qsize(),
+                'mean_batch_size': float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+                'items_per_second': self._items / elapsed if elapsed else 0.0,
+                'busy_fraction': self._run_seconds / elapsed if elapsed else 0.0,
+                'queue_wait_ms_p50': float(np.percentile(waits_ms, 50)) if len(waits_ms) else 0.0,
+                'queue_wait_ms_p95': float(np.percentile(waits_ms, 95)) if len(waits_ms) else 0.0,
+                'queue_wait_ms_max': float(waits_ms.max()) if len(waits_ms) else 0.0,
+            }
@@ -0,0 +1,235 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s'-]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text):
+    """
+    Normalizes query text for use as a cache key.
+    Args:
+        text (str): Raw query text.
+    Returns:
+        str: Lowercased text with punctuation dropped and whitespace collapsed.
+    """
+    text = _PUNCTUATION.sub(" ", text.lower().replace("’", "'"))
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache with size-bounded LRU eviction and an optional TTL.
+    Args:
+        maxsize (int): Maximum number of entries; least recently used entries are evicted first.
+        ttl (float, optional): Seconds an entry stays valid; None keeps entries until evicted.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None on a miss or expired entry.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and entry[1] < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        """
+        Stores value under key, evicting the least recently used entries if full.
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """
+        Returns hit/miss/eviction counters and the current size.
+        """
+        return {
+            'size': len(self), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses,
+            'evictions': self.evictions, 'expirations': self.expirations,
+        }
+
+
+class SQLiteCache:
+    """
+    On-disk cache of text values with the same interface as LRUCache, so entries survive restarts.
+    Args:
+        path (str): SQLite database file.
+        maxsize (int): Maximum number of entries; least recently used entries are evicted first.
+        ttl (float, optional): Seconds an entry stays valid; None keeps entries until evicted.
+    """
+
+    def __init__(self, path, maxsize=100000, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache (last_access)")
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None on a miss or expired entry.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] is not None and row[1] < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.expirations += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, value):
+        """
+        Stores value under key, evicting the least recently used entries if full.
+        """
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            excess = len(self) - self.maxsize
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def stats(self):
+        """
+        Returns hit/miss/eviction counters and the current size.
+        """
+        return {
+            'size': len(self), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses,
+            'evictions': self.evictions, 'expirations': self.expirations,
+        }
+
+
+class EmbeddingStore:
+    """
+    Persistent SQLite store of embedding vectors keyed by (model, text hash), so rebuilds and
+    index experiments reuse vectors of texts that were embedded before.
+    Args:
+        path (str): SQLite database file.
+    """
+
+    # SQLite's default limit on bound parameters per statement is 999
+    _BATCH = 500
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, PRIMARY KEY (model, text_hash))"
+        )
+
+    def get_many(self, model, keys):
+        """
+        Looks up vectors by text hash.
+        Args:
+            model (str): Model identifier.
+            keys (list of str): Text hashes.
+        Returns:
+            dict: Text hash -> float32 vector, for the keys found.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), self._BATCH):
+                batch = keys[i:i + self._BATCH]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN "
+                    f"({','.join('?' * len(batch))})",
+                    (model, *batch),
+                ).fetchall()
+                found.update((key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model, keys, vectors):
+        """
+        Stores vectors under their text hashes.
+        Args:
+            model (str): Model identifier.
+            keys (list of str): Text hashes.
+            vectors (np.ndarray): Row-aligned embedding matrix.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                ((model, key, vector.tobytes()) for key, vector in zip(keys, vectors)),
+            )
+            self._conn.execute("COMMIT")
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the number of stored vectors.
+        """
+        return {'size': len(self), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from utils.faiss_io import DEFAULT_INDEX_SPEC, create_faiss_index, get_search_params
+
+# Incremental builds compact the catalog (drop deleted rows and rebuild the index from the
+# stored embeddings, without re-embedding) once this fraction of rows are tombstones.
+COMPACT_DELETED_FRACTION = float(os.getenv("COMPACT_DELETED_FRACTION", "0.2"))
+
+def content_hashes(texts):
+    """
+    Hashes embedding inputs so rows whose text did not change keep their embedding.
+    Args:
+        texts (iterable of str): embedding_input values.
+    Returns:
+        np.ndarray: 16-hex-digit SHA-1 prefixes.
+    """
+    return np.array([hashlib.sha1(str(text).encode('utf-8')).hexdigest()[:16] for text in texts])
+
+def diff_catalog(catalog, df):
+    """
+    Matches a freshly preprocessed catalog against the current one by show_id and content hash.
+    Args:
+        catalog (pd.DataFrame): Current catalog (row position == FAISS id) with 'show_id',
+            'content_hash' and 'deleted' columns.
+        df (pd.DataFrame): New catalog with 'show_id' and 'content_hash' columns.
+    Returns:
+        dict: 'rows' (current row of each new row, -1 if added), 'added' and 'changed'
+        (positions in df), 'removed' (current rows no longer present).
+    """
+    live = catalog[~catalog['deleted']]
+    row_of_show = pd.Series(live.index.to_numpy(), index=live['show_id'].to_numpy())
+    rows = row_of_show.reindex(df['show_id'].to_numpy()).fillna(-1).to_numpy(dtype=np.int64)
+    matched = rows >= 0
+    changed = np.zeros(len(df), dtype=bool)
+    changed[matched] = catalog['content_hash'].to_numpy()[rows[matched]] != df['content_hash'].to_numpy()[matched]
+    return {
+        'rows': rows,
+        'added': np.flatnonzero(~matched),
+        'changed': np.flatnonzero(changed),
+        'removed': np.setdiff1d(row_of_show.to_numpy(), rows[matched]),
+    }
+
+def _rebuild_index(embeddings, live, index_params):
+    rows = np.flatnonzero(live)
+    return create_faiss_index(
+        embeddings[rows], index_params.get('spec') or DEFAULT_INDEX_SPEC, index_params.get('train_size'),
+        index_params.get('search_params'), index_params.get('ef_construction'), ids=rows.astype(np.int64)
+    )
+
+def update_catalog(catalog, embeddings, index, df, embed, index_params=None):
+    """
+    Applies a new catalog version to the current artifacts, embedding only new or changed rows.
+    Rows keep their position (== FAISS id): changed rows are replaced in place, removed rows
+    become tombstones ('deleted') and new rows are appended. When tombstones exceed
+    COMPACT_DELETED_FRACTION, the index cannot remove vectors (HNSW) or it does not match the
+    catalog, the index is rebuilt from the stored embeddings instead.
+    Args:
+        catalog (pd.DataFrame): Current catalog metadata.
+        embeddings (np.ndarray): Current embedding matrix, row-aligned with catalog.
+        index (faiss.Index): Current FAISS index (modified in place when possible).
+        df (pd.DataFrame): New preprocessed catalog (show_id as index or column).
+        embed (callable): Maps a list of texts to normalized embeddings.
+        index_params (dict, optional): Saved index parameters (spec, train_size, ...), used for rebuilds.
+    Returns:
+        tuple: (catalog, embeddings, index, stats dict).
+    """
+    index_params = index_params or {}
+    catalog = catalog.copy()
+    if 'content_hash' not in catalog:
+        catalog['content_hash'] = content_hashes(catalog['embedding_input'])
+    if 'deleted' not in catalog:
+        catalog['deleted'] = False
+    df = df.reset_index() if 'show_id' not in df else df.reset_index(drop=True)
+    df['content_hash'] = content_hashes(df['embedding_input'])
+    df['deleted'] = False
+
+    index_consistent = index.ntotal == np.count_nonzero(~catalog['deleted'].to_numpy(dtype=bool))
+    diff = diff_catalog(catalog, df)
+    rows = diff['rows'].copy()
+    rows[diff['added']] = len(catalog) + np.arange(len(diff['added']))
+    embed_positions = np.concatenate([diff['changed'], diff['added']])
+    vectors = (np.asarray(embed(df['embedding_input'].iloc[embed_positions].tolist()), dtype=np.float32)
+               if len(embed_positions) else np.zeros((0, embeddings.shape[1]), dtype=np.float32))
+
+    # Metadata: every row present in df is rewritten at its position; removed rows keep theirs
+    kept = catalog.drop(index=rows[rows < len(catalog)])
+    kept.loc[kept.index.isin(diff['removed']), 'deleted'] = True
+    catalog = pd.concat([kept, df.set_index(pd.Index(rows))]).sort_index()
+
+    matrix = np.zeros((len(catalog), embeddings.shape[1]), dtype=np.float32)
+    matrix[:len(embeddings)] = embeddings
+    matrix[diff['removed']] = 0
+    matrix[rows[embed_positions]] = vectors
+    live = ~catalog['deleted'].to_numpy(dtype=bool)
+
+    stats = {'rows': int(live.sum()), 'added': len(diff['added']), 'changed': len(diff['changed']),
+             'removed': len(diff['removed']), 'embedded': len(embed_positions), 'rebuilt_index': False,
+             'compacted': False}
+    index_params = {**index_params, 'search_params': get_search_params(index)}
+
+    if 1 - live.mean() > COMPACT_DELETED_FRACTION:
+        catalog = catalog[live].reset_index(drop=True)
+        matrix, live = matrix[live], np.ones(live.sum(), dtype=bool)
+        index = _rebuild_index(matrix, live, index_params)
+        stats.update(rebuilt_index=True, compacted=True)
+        return catalog, matrix, index, stats
+
+    try:
+        if not index_consistent:
+            raise RuntimeError("index does not match the catalog")
+        stale = np.concatenate([rows[diff['changed']], diff['removed']]).astype(np.int64)
+        if len(stale):
+            index.remove_ids(stale)
+        if len(embed_positions):
+            index.add_with_ids(vectors, rows[embed_positions].astype(np.int64))
+    except RuntimeError:
+        index = _rebuild_index(matrix, live, index_params)
+        stats['rebuilt_index'] = True
+    return catalog, matrix, index, stats
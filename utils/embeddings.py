@@ -1,22 +1,218 @@
+import hashlib
+import os
+import threading
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from utils.batching import MicroBatcher
+from utils.cache import EmbeddingStore, LRUCache
 
-# Loads the pre-trained SentenceTransformer model for generating text embeddings.
+# The pre-trained SentenceTransformer model for generating text embeddings.
 # Model: 'all-MiniLM-L6-v2'
-# Input: None (model is loaded at import)
-# Output: model object used by embedding functions
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# Loaded lazily by get_model() so importing this module does not pay the torch startup cost.
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Backend running the model: 'torch' (SentenceTransformer), 'onnx' or 'onnx-int8'
+# (ONNX Runtime on the model exported by export_onnx.py into ONNX_MODEL_DIR).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/onnx")
+_model = None
+_model_lock = threading.Lock()
+
+# Normalized query text -> read-only float32 embedding (shape: [embedding_dim]).
+query_cache = LRUCache(maxsize=int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")))
+
+# Coalesces query encodes from concurrent requests; see enable_query_batching().
+query_batcher = None
+
+# Persistent (model, text hash) -> vector store consulted by generate_embeddings, so rebuilds
+# only embed new text. Empty EMBEDDING_STORE_PATH disables it.
+EMBEDDING_STORE_PATH = os.getenv(
+    "EMBEDDING_STORE_PATH", os.path.join(os.getenv("MODELS_DIR", "models"), "embedding_store.sqlite")
+)
+_store = None
+_store_lock = threading.Lock()
+
+def load_model(backend=None, num_threads=None):
+    """
+    Loads the embedding model for a backend.
+    Args:
+        backend (str, optional): 'torch', 'onnx' or 'onnx-int8'; defaults to EMBEDDING_BACKEND.
+        num_threads (int, optional): Intra-op threads for inference (defaults to all cores).
+    Returns:
+        SentenceTransformer or OnnxEncoder: Model exposing encode(texts).
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend == 'torch':
+        from sentence_transformers import SentenceTransformer
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        return SentenceTransformer(MODEL_NAME)
+    if backend in ('onnx', 'onnx-int8'):
+        from utils.onnx_embeddings import OnnxEncoder
+        return OnnxEncoder(ONNX_MODEL_DIR, quantized=backend == 'onnx-int8', num_threads=num_threads)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+def get_model():
+    """
+    Returns the embedding model, loading it on first use (thread-safe).
+    Returns:
+        SentenceTransformer or OnnxEncoder: The loaded model.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_model()
+    return _model
+
+def is_model_loaded():
+    """
+    Returns whether the embedding model has been loaded.
+    """
+    return _model is not None
+
+def warm_up():
+    """
+    Loads the embedding model and runs one encode so the first request does not pay for it.
+    """
+    get_model().encode(["warm up"])
+
+def enable_query_batching(max_batch_size=None, max_wait_ms=None):
+    """
+    Routes query encodes through a micro-batcher so concurrent requests share one model call.
+    Defaults come from EMBEDDING_BATCH_MAX_SIZE (32) and EMBEDDING_BATCH_MAX_WAIT_MS (5).
+    Args:
+        max_batch_size (int, optional): Largest batch passed to the model.
+        max_wait_ms (float, optional): Longest time a query waits for others to join its batch.
+    Returns:
+        MicroBatcher: The active batcher (stats() exposes throughput and queueing latency).
+    """
+    global query_batcher
+    if query_batcher is None:
+        query_batcher = MicroBatcher(
+            lambda texts: list(_encode_normalized(texts)),
+            max_batch_size=max_batch_size or int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32")),
+            max_wait_ms=max_wait_ms if max_wait_ms is not None else float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5")),
+            name='query-embedding-batcher',
+        )
+    return query_batcher
+
+def normalize_query_text(text):
+    """
+    Normalizes a query for the embedding cache.
+    The model is uncased, so lowercasing and collapsing whitespace do not change its output.
+    Args:
+        text (str): Input query string.
+    Returns:
+        str: Cache key.
+    """
+    return " ".join(text.lower().split())
+
+def get_embedding_store():
+    """
+    Returns the persistent embedding store, opening it on first use (None when disabled).
+    """
+    global _store
+    if _store is None and EMBEDDING_STORE_PATH:
+        with _store_lock:
+            if _store is None:
+                _store = EmbeddingStore(EMBEDDING_STORE_PATH)
+    return _store
+
+def model_key(backend=None):
+    """
+    Identifies the vectors a backend produces (the quantized ONNX model's differ slightly).
+    """
+    return f"{MODEL_NAME}:{backend or EMBEDDING_BACKEND}"
+
+def text_hash(text):
+    """
+    Store key of a text: SHA-1 of its normalized form, which embeds identically (see normalize_query_text).
+    """
+    return hashlib.sha1(normalize_query_text(str(text)).encode('utf-8')).hexdigest()
+
+def embed_with_store(texts, encode, backend=None):
+    """
+    Embeds texts, taking vectors from the embedding store when present and saving new ones.
+    Args:
+        texts (list of str): Input text strings.
+        encode (callable): Maps a list of texts to normalized embeddings; called once with the misses.
+        backend (str, optional): Backend encode runs on; defaults to EMBEDDING_BACKEND.
+    Returns:
+        np.ndarray: 2D float32 array of normalized embeddings, row-aligned with texts.
+    """
+    store = get_embedding_store()
+    if store is None or not len(texts):
+        return np.asarray(encode(texts), dtype=np.float32)
+    model = model_key(backend)
+    keys = [text_hash(text) for text in texts]
+    found = store.get_many(model, keys)
+    # Each missing text is embedded once, even if it occurs several times
+    missing = {key: text for key, text in zip(keys, texts) if key not in found}
+    if missing:
+        vectors = np.asarray(encode(list(missing.values())), dtype=np.float32)
+        store.put_many(model, list(missing), vectors)
+        found.update(zip(missing, vectors))
+    print(f"Embedding store: reused {len(texts) - sum(key in missing for key in keys)} of {len(texts)} texts, "
+          f"embedded {len(missing)}")
+    return np.vstack([found[key] for key in keys])
 
 def generate_embeddings(texts):
     """
-    Generate normalized embeddings for a list of texts.
+    Generate normalized embeddings for a list of texts, reusing vectors from the embedding store.
     Args:
         texts (list of str): List of input text strings.
     Returns:
         np.ndarray: 2D array of normalized embeddings (shape: [len(texts), embedding_dim]).
     """
-    embeddings = model.encode(texts, show_progress_bar=True)
-    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    def encode(batch):
+        embeddings = get_model().encode(batch, show_progress_bar=True)
+        return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embed_with_store(texts, encode)
+
+def _encode_normalized(texts):
+    """
+    Encodes texts with the model and L2-normalizes them.
+    Args:
+        texts (list of str): Input text strings.
+    Returns:
+        np.ndarray: 2D float32 array of normalized embeddings.
+    """
+    emb = get_model().encode(texts).astype(np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    return emb
+
+def embed_queries(texts):
+    """
+    Generate normalized embeddings for several query strings, encoding only cache misses.
+    All misses are encoded together in a single model call (or micro-batch, if enabled).
+    Args:
+        texts (list of str): Input query strings.
+    Returns:
+        np.ndarray: 2D float32 array of normalized embeddings (shape: [len(texts), embedding_dim]).
+    """
+    keys = [normalize_query_text(t) for t in texts]
+    vectors = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        vector = query_cache.get(key)
+        if vector is None:
+            missing.append(key)
+        else:
+            vectors[key] = vector
+
+    if missing:
+        if query_batcher is not None:
+            futures = [query_batcher.submit(key) for key in missing]
+            emb = np.vstack([future.result() for future in futures])
+        else:
+            emb = _encode_normalized(missing)
+        emb.flags.writeable = False
+        for key, vector in zip(missing, emb):
+            query_cache.set(key, vector)
+            vectors[key] = vector
+
+    return np.vstack([vectors[key] for key in keys])
 
 def embed_query(text):
     """
@@ -26,5 +222,4 @@ def embed_query(text):
     Returns:
         np.ndarray: 2D array of normalized embedding (shape: [1, embedding_dim]).
     """
-    emb = model.encode([text])
-    return emb / np.linalg.norm(emb, axis=1, keepdims=True)
+    return embed_queries([text])
@@ -1,55 +1,303 @@
 import faiss
+import json
+import os
+import numpy as np
 import pandas as pd
+import pyarrow.feather as feather
 from utils.embeddings import generate_embeddings
 
-def build_faiss_index(df):
+# Files making up a catalog directory written by save_id_map.
+CATALOG_EMBEDDINGS = 'embeddings.npy'
+CATALOG_METADATA = 'metadata.feather'
+CATALOG_MANIFEST = 'manifest.json'
+
+# faiss.index_factory description of the index: "Flat" (exact), "HNSW32", "IVF1024,PQ16", ...
+DEFAULT_INDEX_SPEC = 'Flat'
+# Search-time settings of approximate indexes, applied when the index type has them.
+DEFAULT_SEARCH_PARAMS = {'nprobe': 16, 'efSearch': 64}
+# Index of compact builds (build_index.py --compact): PQ codes in memory, re-ranked against a
+# float16 catalog matrix that is memory-mapped, so only candidate rows are read.
+COMPACT_INDEX_SPEC = 'PQ96'
+# Indexes storing compressed codes (PQ, SQ8, ...) fetch RERANK_FACTOR x top_k candidates, which
+# are re-scored exactly against the catalog embedding matrix. 0 or 1 disables re-ranking.
+RERANK_FACTOR = int(os.getenv("RERANK_FACTOR", "4"))
+
+def create_faiss_index(embeddings, spec=DEFAULT_INDEX_SPEC, train_size=None, search_params=None,
+                       ef_construction=None, seed=0, ids=None):
+    """
+    Builds an inner-product FAISS index of any index_factory type over normalized embeddings.
+    Indexes without their own id storage are wrapped in IndexIDMap2, so ids stay stable when
+    vectors are removed or replaced by incremental builds.
+    Args:
+        embeddings (np.ndarray): float32 matrix.
+        spec (str): index_factory description, e.g. "Flat", "HNSW32" or "IVF1024,PQ16".
+        train_size (int, optional): Vectors sampled to train IVF/PQ indexes (default: all).
+        search_params (dict, optional): Overrides for DEFAULT_SEARCH_PARAMS (nprobe, efSearch).
+        ef_construction (int, optional): HNSW construction beam width.
+        seed (int): Seed of the training sample.
+        ids (np.ndarray, optional): int64 FAISS id of each row (default: row positions).
+    Returns:
+        faiss.Index: The populated index with its search parameters set.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    index = faiss.index_factory(embeddings.shape[1], spec, faiss.METRIC_INNER_PRODUCT)
+    if ef_construction and hasattr(index, 'hnsw'):
+        index.hnsw.efConstruction = ef_construction
+    if not index.is_trained:
+        sample = embeddings
+        if train_size and train_size < len(embeddings):
+            rows = np.random.default_rng(seed).choice(len(embeddings), train_size, replace=False)
+            sample = embeddings[np.sort(rows)]
+        index.train(sample)
+    if faiss.try_extract_index_ivf(index) is None:
+        index = faiss.IndexIDMap2(index)
+    index.add_with_ids(embeddings, np.arange(len(embeddings), dtype=np.int64) if ids is None else ids)
+    set_search_params(index, {**DEFAULT_SEARCH_PARAMS, **(search_params or {})})
+    return index
+
+def get_search_params(index):
+    """
+    Returns the search-time settings that apply to an index (empty for exact indexes).
+    """
+    params = {}
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        params['nprobe'] = int(ivf.nprobe)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    if hasattr(index, 'hnsw'):
+        params['efSearch'] = int(index.hnsw.efSearch)
+    return params
+
+def set_search_params(index, params):
+    """
+    Applies search-time settings, ignoring those the index type does not have.
+    Args:
+        index (faiss.Index): FAISS index.
+        params (dict): e.g. {'nprobe': 16, 'efSearch': 64}.
+    """
+    applicable = get_search_params(index)
+    space = faiss.ParameterSpace()
+    for name, value in params.items():
+        if name in applicable:
+            space.set_index_parameter(index, name, value)
+
+def selector_search_params(index, selector):
+    """
+    Builds per-query SearchParameters restricting a search to an ID selector. IVF and HNSW
+    indexes need their own parameter types, which also carry their nprobe/efSearch.
+    Args:
+        index (faiss.Index): FAISS index.
+        selector (faiss.IDSelector): IDs to consider.
+    Returns:
+        faiss.SearchParameters: Parameters to pass to index.search.
+    """
+    params = get_search_params(index)
+    if 'nprobe' in params:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=params['nprobe'])
+    if 'efSearch' in params:
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=params['efSearch'])
+    return faiss.SearchParameters(sel=selector)
+
+def supports_id_selector(index):
+    """
+    Returns whether searches on an index accept an ID selector; flat PQ indexes (the compact spec) do not.
+    """
+    if faiss.try_extract_index_ivf(index) is not None:
+        return True
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    return hasattr(index, 'hnsw') or not isinstance(index, (faiss.IndexPQ, faiss.IndexPQFastScan))
+
+def is_lossy_index(index):
+    """
+    Returns whether an index stores compressed codes (PQ, scalar quantizers) instead of the vectors.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return not isinstance(ivf, faiss.IndexIVFFlat)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    if hasattr(index, 'hnsw'):
+        index = faiss.downcast_index(index.storage)
+    return not isinstance(index, faiss.IndexFlat)
+
+def rerank(queries, candidates, embeddings, top_k):
+    """
+    Re-scores candidate ids by exact inner product with their catalog vectors.
+    Args:
+        queries (np.ndarray): Normalized query matrix.
+        candidates (np.ndarray): Candidate ids per query (-1 for none), from an index search.
+        embeddings (np.ndarray): Catalog embedding matrix (float32 or float16, may be memory-mapped).
+        top_k (int): Results kept per query.
+    Returns:
+        np.ndarray: int64 ids of shape [len(queries), top_k], best first, padded with -1.
+    """
+    results = np.full((len(queries), top_k), -1, dtype=np.int64)
+    for i, (query, ids) in enumerate(zip(queries, candidates)):
+        ids = ids[ids >= 0]
+        scores = np.asarray(embeddings[ids], dtype=np.float32) @ query
+        best = ids[np.argsort(-scores)[:top_k]]
+        results[i, :len(best)] = best
+    return results
+
+def search_index(index, queries, top_k, embeddings=None, params=None):
+    """
+    Searches the index, re-ranking the candidates of lossy indexes against the catalog vectors
+    when they are given (see RERANK_FACTOR).
+    Args:
+        index (faiss.Index): FAISS index.
+        queries (np.ndarray): Normalized float32 query matrix.
+        top_k (int): Results per query.
+        embeddings (np.ndarray, optional): Catalog embedding matrix row-aligned with the index ids.
+        params (faiss.SearchParameters, optional): Per-query parameters (e.g. an ID selector).
+    Returns:
+        np.ndarray: Result ids of shape [len(queries), top_k], best first, padded with -1.
+    """
+    if embeddings is None or RERANK_FACTOR <= 1 or not is_lossy_index(index):
+        return index.search(queries, top_k, params=params)[1]
+    _, candidates = index.search(queries, top_k * RERANK_FACTOR, params=params)
+    return rerank(queries, candidates, embeddings, top_k)
+
+def build_faiss_index(df, spec=DEFAULT_INDEX_SPEC, train_size=None, search_params=None, ef_construction=None):
     """
     Builds a FAISS index from the embeddings of the DataFrame.
     Args:
         df (pd.DataFrame): Input DataFrame with 'embedding_input' column.
+        spec (str): index_factory description (see create_faiss_index).
+        train_size (int, optional): Training sample size for IVF/PQ indexes.
+        search_params (dict, optional): nprobe/efSearch overrides.
+        ef_construction (int, optional): HNSW construction beam width.
     Returns:
         tuple: Tuple containing the FAISS index and the DataFrame with reset index.
     """
     embeddings = generate_embeddings(df['embedding_input'].tolist())
-    index = faiss.IndexFlatIP(embeddings.shape[1])
-    index.add(embeddings)
+    index = create_faiss_index(embeddings, spec, train_size, search_params, ef_construction)
     df['embedding'] = list(embeddings)
     return index, df.reset_index()
 
-def save_faiss_index(index, path):
+def embed_catalog_batches(batches, embed=generate_embeddings):
     """
-    Saves the FAISS index to a file.
+    Embeds preprocessed catalog chunks as they are produced (see
+    utils.preprocess.iter_preprocessed_netflix_data), so the raw CSV is never held in memory at once.
+    Args:
+        batches (iterable of pd.DataFrame): Chunks with an 'embedding_input' column, indexed by show_id.
+        embed (callable): Maps a list of texts to normalized embeddings (e.g. a ShardedEmbedder).
+    Returns:
+        tuple: (ID map DataFrame with reset index, row-aligned float32 embedding matrix).
+    """
+    metadata, embeddings = [], []
+    for batch in batches:
+        embeddings.append(np.asarray(embed(batch['embedding_input'].tolist()), dtype=np.float32))
+        metadata.append(batch)
+    return pd.concat(metadata).reset_index(), np.vstack(embeddings)
+
+def index_params_path(path):
+    """
+    Returns the path of the JSON file describing the index saved at path.
+    """
+    return path + '.json'
+
+def save_faiss_index(index, path, params=None):
+    """
+    Saves the FAISS index to a file, with its build and search parameters next to it.
     Args:
         index (faiss.Index): The FAISS index to save.
         path (str): The path to save the index.
+        params (dict, optional): Build details to record (spec, train_size, benchmark report, ...).
     """
     faiss.write_index(index, path)
+    with open(index_params_path(path), 'w') as f:
+        json.dump({**(params or {}), 'dim': index.d, 'ntotal': index.ntotal,
+                   'search_params': get_search_params(index)}, f, indent=2)
 
-def save_id_map(df, path):
+def load_index_params(path):
     """
-    Saves the DataFrame to a pickle file.
+    Loads the parameters saved with an index ({} for indexes saved without them).
+    """
+    params_path = index_params_path(path)
+    if not os.path.exists(params_path):
+        return {}
+    with open(params_path) as f:
+        return json.load(f)
+
+def save_id_map(df, path, embeddings=None, vectors_dtype='float32'):
+    """
+    Saves the DataFrame as a catalog directory, or as a pickle if path ends with '.pkl'.
+    The catalog directory holds a contiguous embedding matrix (.npy), memory-mapped on load,
+    and the remaining columns as uncompressed Arrow metadata.
     Args:
         df (pd.DataFrame): The DataFrame to save.
         path (str): The path to save the DataFrame.
+        embeddings (np.ndarray, optional): Row-aligned embedding matrix, used instead of
+            the 'embedding' column.
+        vectors_dtype (str): 'float32', or 'float16' to halve the matrix (compact catalogs).
     """
-    df.to_pickle(path)
+    if path.endswith('.pkl'):
+        df.to_pickle(path)
+        return
+
+    os.makedirs(path, exist_ok=True)
+    metadata = df.drop(columns=['embedding'], errors='ignore').reset_index(drop=True)
+    feather.write_feather(metadata, os.path.join(path, CATALOG_METADATA), compression='uncompressed')
+
+    dim = 0
+    if embeddings is None and 'embedding' in df:
+        embeddings = np.vstack(df['embedding'].to_numpy())
+    if embeddings is not None:
+        embeddings = np.ascontiguousarray(embeddings, dtype=vectors_dtype)
+        np.save(os.path.join(path, CATALOG_EMBEDDINGS), embeddings)
+        dim = embeddings.shape[1]
 
-def load_faiss_index(path):
+    with open(os.path.join(path, CATALOG_MANIFEST), 'w') as f:
+        json.dump({'num_rows': len(metadata), 'dim': dim, 'dtype': vectors_dtype,
+                   'columns': list(metadata.columns)}, f, indent=2)
+
+def load_faiss_index(path, mmap=True):
     """
-    Loads the FAISS index from a file.
+    Loads the FAISS index from a file and applies its saved search parameters.
     Args:
         path (str): The path to load the index from.
+        mmap (bool): Map the index's vectors/codes read-only from the file instead of copying them,
+            so every worker process, including after a hot reload, shares the page cache copy.
+            Needs faiss >= 1.11 (IO_FLAG_MMAP_IFC); older versions read a private copy.
+            Pass False to get an index that can be modified (incremental builds).
     Returns:
         faiss.Index: The loaded FAISS index.
     """
-    return faiss.read_index(path)
+    mmap_flag = getattr(faiss, 'IO_FLAG_MMAP_IFC', None)
+    if mmap and mmap_flag is None:
+        print(f"faiss {faiss.__version__} cannot memory-map index codes; reading a private copy of {path}")
+    flags = mmap_flag | faiss.IO_FLAG_READ_ONLY if mmap and mmap_flag is not None else 0
+    index = faiss.read_index(path, flags)
+    set_search_params(index, load_index_params(path).get('search_params', {}))
+    return index
 
 def load_id_map(path):
     """
-    Loads the DataFrame from a pickle file.
+    Loads the DataFrame from a catalog directory or a pickle file.
+    Catalog metadata is read from an uncompressed Arrow file without unpickling, but converted
+    into pandas columns private to the process (about 0.5 KB per title; only the embedding
+    matrix is shared between workers). The matrix is not attached and should be loaded with
+    load_embeddings.
     Args:
         path (str): The path to load the DataFrame from.
     Returns:
         pd.DataFrame: The loaded DataFrame.
     """
-    return pd.read_pickle(path)
\ No newline at end of file
+    if os.path.isdir(path):
+        return feather.read_table(os.path.join(path, CATALOG_METADATA), memory_map=True).to_pandas()
+    return pd.read_pickle(path)
+
+def load_embeddings(path, mmap=True):
+    """
+    Loads the catalog embedding matrix, row-aligned with the ID map.
+    Args:
+        path (str): Catalog directory, or a legacy pickle with an 'embedding' column.
+        mmap (bool): Memory-map the matrix read-only so worker processes share its pages.
+    Returns:
+        np.ndarray: float32 (or float16, for compact catalogs) matrix of shape [num_rows, embedding_dim].
+    """
+    if os.path.isdir(path):
+        return np.load(os.path.join(path, CATALOG_EMBEDDINGS), mmap_mode='r' if mmap else None)
+    return np.vstack(pd.read_pickle(path)['embedding'].to_numpy()).astype(np.float32)
@@ -0,0 +1,293 @@
+from bisect import bisect_right
+from itertools import accumulate
+import numpy as np
+from utils.cache import LRUCache
+
+# Multi-valued catalog columns are split into terms; a query value matches a
+# row when it is a substring of one of the row's terms (same as the previous
+# lowercase `str.contains` scan, minus matches spanning a ', ' separator).
+TERM_FIELDS = {'genre': 'listed_in', 'actors': 'cast', 'country': 'country'}
+EXACT_FIELDS = {'type': 'type', 'rating': 'rating'}
+RANGE_FIELDS = ['release_year', 'duration_cleaned']
+
+# Separator used to join a field's vocabulary into one searchable string.
+_TERM_SEP = '\x00'
+
+# Per-field bound on cached substring masks (one bool per catalog row each).
+_MASK_CACHE_SIZE = 1024
+
+
+def _split_terms(value):
+    """
+    Splits a comma-separated catalog cell into lowercase terms.
+    Args:
+        value: Cell value (str or NaN).
+    Returns:
+        list: Unique non-empty lowercase terms.
+    """
+    if not isinstance(value, str):
+        return []
+    return list(dict.fromkeys(t.strip().lower() for t in value.split(',') if t.strip()))
+
+
+def _build_postings(cells, tokenize):
+    """
+    Builds a vocabulary and CSR-style posting lists for one column.
+    Args:
+        cells (iterable): Column values in row order.
+        tokenize (callable): Function mapping a cell to a list of terms.
+    Returns:
+        dict: 'terms' (sorted str array), 'offsets' (int64) and 'postings' (int32 row positions).
+    """
+    lists = {}
+    for row, cell in enumerate(cells):
+        for term in tokenize(cell):
+            lists.setdefault(term, []).append(row)
+
+    terms = sorted(lists)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(lists[t]) for t in terms])
+    postings = np.fromiter(
+        (row for t in terms for row in lists[t]), dtype=np.int32, count=int(offsets[-1])
+    )
+    return {'terms': np.array(terms, dtype=str), 'offsets': offsets, 'postings': postings}
+
+
+def _build_range(values):
+    """
+    Builds a sorted view of a numeric column for range lookups.
+    Args:
+        values (pd.Series): Numeric column in row order.
+    Returns:
+        dict: 'values' (sorted float64, NaN dropped) and 'rows' (int32 row positions).
+    """
+    values = values.to_numpy(dtype=np.float64)
+    rows = np.flatnonzero(~np.isnan(values))
+    order = rows[np.argsort(values[rows], kind='stable')]
+    return {'values': values[order], 'rows': order.astype(np.int32)}
+
+
+def _prepare_field(field):
+    """
+    Adds the derived lookup structures used at query time to a loaded field.
+    Args:
+        field (dict): Field with 'terms', 'offsets' and 'postings'.
+    Returns:
+        dict: The same field with 'text', 'starts' and 'lookup' added.
+    """
+    terms = field['terms'].tolist()
+    field['text'] = _TERM_SEP.join(terms)
+    field['starts'] = list(accumulate((len(t) + 1 for t in terms[:-1]), initial=0)) if terms else []
+    field['lookup'] = {t: i for i, t in enumerate(terms)}
+    field['cache'] = LRUCache(maxsize=_MASK_CACHE_SIZE)
+    return field
+
+
+def build_filter_index(df):
+    """
+    Builds an inverted index over the catalog columns used by intent filters.
+    Args:
+        df (pd.DataFrame): ID map DataFrame (row positions must match FAISS ids).
+    Returns:
+        dict: Filter index with posting lists for term/exact fields and sorted arrays for range fields,
+        plus a 'live' row mask when the catalog has rows deleted by incremental builds.
+    """
+    filter_index = {'num_rows': len(df)}
+    if 'deleted' in df:
+        filter_index['live'] = ~df['deleted'].to_numpy(dtype=bool)
+    for key, column in TERM_FIELDS.items():
+        filter_index[key] = _prepare_field(_build_postings(df[column].tolist(), _split_terms))
+    for key, column in EXACT_FIELDS.items():
+        filter_index[key] = _prepare_field(_build_postings(
+            df[column].tolist(), lambda v: [v.lower()] if isinstance(v, str) else []
+        ))
+    for column in RANGE_FIELDS:
+        filter_index[column] = _build_range(df[column])
+    return filter_index
+
+
+def save_filter_index(filter_index, path):
+    """
+    Saves the filter index to an uncompressed .npz archive.
+    Args:
+        filter_index (dict): Filter index from build_filter_index.
+        path (str): The path to save the filter index.
+    """
+    arrays = {'num_rows': np.array(filter_index['num_rows'], dtype=np.int64)}
+    if 'live' in filter_index:
+        arrays['live'] = filter_index['live']
+    for key in list(TERM_FIELDS) + list(EXACT_FIELDS):
+        for part in ('terms', 'offsets', 'postings'):
+            arrays[f'{key}.{part}'] = filter_index[key][part]
+    for column in RANGE_FIELDS:
+        for part in ('values', 'rows'):
+            arrays[f'{column}.{part}'] = filter_index[column][part]
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def load_filter_index(path):
+    """
+    Loads a filter index saved with save_filter_index.
+    Args:
+        path (str): The path to load the filter index from.
+    Returns:
+        dict: The loaded filter index.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        filter_index = {'num_rows': int(data['num_rows'])}
+        if 'live' in data:
+            filter_index['live'] = data['live']
+        for key in list(TERM_FIELDS) + list(EXACT_FIELDS):
+            filter_index[key] = _prepare_field({
+                part: data[f'{key}.{part}'] for part in ('terms', 'offsets', 'postings')
+            })
+        for column in RANGE_FIELDS:
+            filter_index[column] = {part: data[f'{column}.{part}'] for part in ('values', 'rows')}
+    return filter_index
+
+
+def _term_ids_containing(field, needle):
+    """
+    Finds vocabulary entries that contain a substring.
+    Args:
+        field (dict): Prepared term field.
+        needle (str): Lowercase substring.
+    Returns:
+        list: Sorted term ids whose term contains the substring.
+    """
+    text, ids, pos = field['text'], set(), field['text'].find(needle)
+    while pos != -1:
+        ids.add(bisect_right(field['starts'], pos) - 1)
+        # Skip to the next term; one hit per term is enough
+        next_start = text.find(_TERM_SEP, pos)
+        if next_start == -1:
+            break
+        pos = text.find(needle, next_start + 1)
+    return sorted(ids)
+
+
+def _rows_for_terms(field, term_ids, num_rows):
+    """
+    Unions the posting lists of several terms into a row bitmap.
+    Args:
+        field (dict): Prepared term field.
+        term_ids (list): Term ids to union.
+        num_rows (int): Number of rows in the catalog.
+    Returns:
+        np.ndarray: Boolean row mask.
+    """
+    mask = np.zeros(num_rows, dtype=bool)
+    offsets, postings = field['offsets'], field['postings']
+    if len(term_ids) > 64:
+        # Broad substrings match many terms; select their postings in one pass
+        selected = np.zeros(len(offsets) - 1, dtype=bool)
+        selected[list(term_ids)] = True
+        mask[postings[np.repeat(selected, np.diff(offsets))]] = True
+        return mask
+    for term_id in term_ids:
+        mask[postings[offsets[term_id]:offsets[term_id + 1]]] = True
+    return mask
+
+
+def _contains_mask(filter_index, key, value):
+    """
+    Row mask for rows whose field contains a substring (cached per value).
+    """
+    field = filter_index[key]
+    needle = value.lower()
+    mask = field['cache'].get(needle)
+    if mask is None:
+        term_ids = _term_ids_containing(field, needle) if needle else range(len(field['terms']))
+        mask = _rows_for_terms(field, term_ids, filter_index['num_rows'])
+        field['cache'].set(needle, mask)
+    return mask
+
+
+def _equals_mask(filter_index, key, value):
+    """
+    Row mask for rows whose field equals a value case-insensitively.
+    """
+    field = filter_index[key]
+    term_id = field['lookup'].get(value.lower())
+    return _rows_for_terms(field, [] if term_id is None else [term_id], filter_index['num_rows'])
+
+
+def _range_mask(filter_index, column, op, threshold):
+    """
+    Row mask for rows whose numeric column satisfies `op threshold` (op is '<', '>' or '==').
+    """
+    field = filter_index[column]
+    mask = np.zeros(filter_index['num_rows'], dtype=bool)
+    values, rows = field['values'], field['rows']
+    if op == '<':
+        mask[rows[:np.searchsorted(values, threshold, side='left')]] = True
+    elif op == '>':
+        mask[rows[np.searchsorted(values, threshold, side='right'):]] = True
+    else:
+        lo, hi = np.searchsorted(values, threshold, side='left'), np.searchsorted(values, threshold, side='right')
+        mask[rows[lo:hi]] = True
+    return mask
+
+
+def parse_duration_minutes(dur):
+    """
+    Parses the intent's duration_minutes condition.
+    Args:
+        dur (str): Condition such as "< 60" or "> 120".
+    Returns:
+        tuple or None: (op, threshold) or None if the condition is not understood.
+    """
+    try:
+        if '<' in dur:
+            return '<', int(dur.split('<')[-1].strip())
+        elif '>' in dur:
+            return '>', int(dur.split('>')[-1].strip())
+    except:
+        pass
+    return None
+
+
+def intent_row_mask(filter_index, intent):
+    """
+    Computes the boolean row mask of catalog rows matching the intent filters.
+    Args:
+        filter_index (dict): Filter index from build_filter_index or load_filter_index.
+        intent (dict): Intent dictionary.
+    Returns:
+        np.ndarray: Boolean mask over catalog rows.
+    """
+    mask = filter_index['live'].copy() if 'live' in filter_index else np.ones(filter_index['num_rows'], dtype=bool)
+
+    for key in ('genre', 'type', 'actors', 'country'):
+        if intent.get(key):
+            for value in intent[key]:
+                if key in TERM_FIELDS:
+                    mask &= _contains_mask(filter_index, key, value)
+                else:
+                    mask &= _equals_mask(filter_index, key, value)
+
+    if intent.get("rating"):
+        mask &= _equals_mask(filter_index, 'rating', intent['rating'])
+
+    if intent.get("release_year"):
+        mask &= _range_mask(filter_index, 'release_year', '==', int(intent['release_year']))
+
+    if intent.get("duration_minutes"):
+        condition = parse_duration_minutes(intent["duration_minutes"])
+        if condition:
+            mask &= _range_mask(filter_index, 'duration_cleaned', *condition)
+
+    return mask
+
+
+def intent_rows(filter_index, intent):
+    """
+    Returns the catalog row positions matching the intent filters.
+    Args:
+        filter_index (dict): Filter index.
+        intent (dict): Intent dictionary.
+    Returns:
+        np.ndarray: Sorted int64 row positions.
+    """
+    return np.flatnonzero(intent_row_mask(filter_index, intent))
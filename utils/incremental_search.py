@@ -0,0 +1,74 @@
+import os
+import time
+from utils.embeddings import normalize_query_text
+from utils.search import search_fallback, search_with_intent
+
+# How long a partial transcript must stay unchanged before it is searched.
+SPECULATIVE_DEBOUNCE_MS = float(os.getenv("SPECULATIVE_DEBOUNCE_MS", "250"))
+
+class IncrementalSearch:
+    """
+    Search-as-you-speak: partial transcripts trigger speculative embedding-only searches
+    (search_fallback), debounced so a search runs only once the transcript has been stable
+    for debounce_ms; finalize() replaces them with the intent-aware search_with_intent result.
+    Args:
+        index (faiss.Index): FAISS index.
+        id_map (pd.DataFrame): ID map DataFrame.
+        top_k (int): Number of results per search.
+        filter_index (dict, optional): Filter index for the final search.
+        embeddings (np.ndarray, optional): Catalog embeddings for the final search.
+        text_index (dict, optional): BM25 text index; makes both searches hybrid.
+        debounce_ms (float, optional): Stability window; defaults to SPECULATIVE_DEBOUNCE_MS.
+        min_words (int): Shortest partial transcript worth searching.
+    """
+    def __init__(self, index, id_map, top_k=5, filter_index=None, embeddings=None, debounce_ms=None, min_words=2,
+                 text_index=None):
+        self.index = index
+        self.id_map = id_map
+        self.top_k = top_k
+        self.filter_index = filter_index
+        self.embeddings = embeddings
+        self.text_index = text_index
+        self.debounce_s = (debounce_ms if debounce_ms is not None else SPECULATIVE_DEBOUNCE_MS) / 1000
+        self.min_words = min_words
+        self.last_query = None
+        self.speculative_searches = 0
+        self._pending = None
+        self._pending_since = None
+
+    def update(self, transcript, now=None):
+        """
+        Reports the latest partial transcript.
+        Args:
+            transcript (str): Partial transcript.
+            now (float, optional): Timestamp in seconds; defaults to time.monotonic(). Pass the
+                audio position instead when audio arrives faster than real time.
+        Returns:
+            pd.DataFrame or None: Speculative results when a search ran, else None.
+        """
+        now = time.monotonic() if now is None else now
+        text = normalize_query_text(transcript or "")
+        if text != self._pending:
+            self._pending, self._pending_since = text, now
+            return None
+        if (text == self.last_query or len(text.split()) < self.min_words
+                or now - self._pending_since < self.debounce_s):
+            return None
+        self.last_query = text
+        self.speculative_searches += 1
+        return search_fallback(text, self.index, self.id_map, top_k=self.top_k, embeddings=self.embeddings,
+                               text_index=self.text_index)
+
+    def finalize(self, transcript, intent_deadline_ms=None):
+        """
+        Runs the intent-aware search on the final transcript.
+        Args:
+            transcript (str): Final transcript.
+            intent_deadline_ms (float, optional): Intent latency budget passed to search_with_intent.
+        Returns:
+            pd.DataFrame: Final results.
+        """
+        self.last_query = normalize_query_text(transcript)
+        return search_with_intent(transcript, self.index, self.id_map, top_k=self.top_k,
+                                  filter_index=self.filter_index, embeddings=self.embeddings,
+                                  intent_deadline_ms=intent_deadline_ms, text_index=self.text_index)
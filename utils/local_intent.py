@@ -0,0 +1,174 @@
+import os
+import re
+from utils.cache import normalize_query
+
+# Queries parsed with at least this confidence skip the LLM call.
+LOCAL_INTENT_MIN_CONFIDENCE = float(os.getenv("LOCAL_INTENT_MIN_CONFIDENCE", "0.8"))
+
+# Query phrase -> genre in the catalog's own listed_in spelling. The intent filters match it as a
+# substring of the listed_in terms, and the enriched query text carries a real genre name.
+GENRE_KEYWORDS = {
+    'funny': 'Comedies', 'comedy': 'Comedies', 'comedies': 'Comedies', 'comedic': 'Comedies',
+    'hilarious': 'Comedies', 'sitcom': 'Comedies', 'stand-up': 'Stand-Up Comedy', 'standup': 'Stand-Up Comedy',
+    'romantic': 'Romantic', 'romance': 'Romantic', 'rom-com': 'Romantic', 'romcom': 'Romantic',
+    'love story': 'Romantic',
+    'horror': 'Horror', 'scary': 'Horror', 'spooky': 'Horror', 'creepy': 'Horror',
+    'thriller': 'Thrillers', 'thrillers': 'Thrillers', 'suspense': 'Thrillers', 'suspenseful': 'Thrillers',
+    'crime': 'Crime', 'documentary': 'Documentaries', 'documentaries': 'Documentaries', 'docuseries': 'Docuseries',
+    'drama': 'Dramas', 'dramas': 'Dramas', 'action': 'Action', 'adventure': 'Adventure',
+    'sci-fi': 'Sci-Fi', 'scifi': 'Sci-Fi', 'science fiction': 'Sci-Fi', 'fantasy': 'Fantasy',
+    'anime': 'Anime', 'musical': 'Musicals', 'musicals': 'Musicals', 'music': 'Music',
+    'sports': 'Sports', 'sport': 'Sports', 'reality': 'Reality', 'mystery': 'Mysteries', 'mysteries': 'Mysteries',
+    'teen': 'Teen', 'lgbtq': 'LGBTQ', 'classic': 'Classic', 'indie': 'Independent',
+    'independent': 'Independent', 'faith': 'Faith', 'spiritual': 'Spirituality',
+}
+
+# Subjects that are not catalog genres ("Science & Nature TV" would exclude every nature film):
+# they enrich the query text without filtering.
+THEME_KEYWORDS = {'nature': 'nature', 'wildlife': 'nature'}
+
+TYPE_KEYWORDS = {
+    'movie': 'movie', 'movies': 'movie', 'film': 'movie', 'films': 'movie',
+    'tv show': 'tv show', 'tv shows': 'tv show', 'show': 'tv show', 'shows': 'tv show',
+    'series': 'tv show', 'tv': 'tv show', 'sitcom': 'tv show',
+}
+
+DEMONYMS = {
+    'indian': 'india', 'bollywood': 'india', 'korean': 'south korea', 'k-drama': 'south korea',
+    'japanese': 'japan', 'british': 'united kingdom', 'uk': 'united kingdom', 'american': 'united states',
+    'usa': 'united states', 'french': 'france', 'spanish': 'spain', 'mexican': 'mexico',
+    'german': 'germany', 'italian': 'italy', 'chinese': 'china', 'turkish': 'turkey',
+    'nigerian': 'nigeria', 'egyptian': 'egypt', 'brazilian': 'brazil', 'canadian': 'canada',
+    'australian': 'australia', 'thai': 'thailand', 'filipino': 'philippines', 'indonesian': 'indonesia',
+    'swedish': 'sweden', 'norwegian': 'norway', 'danish': 'denmark', 'irish': 'ireland',
+    'russian': 'russia', 'polish': 'poland', 'argentinian': 'argentina', 'colombian': 'colombia',
+}
+
+MOOD_KEYWORDS = {
+    'lighthearted': 'lighthearted', 'light-hearted': 'lighthearted', 'feel-good': 'lighthearted',
+    'feel good': 'lighthearted', 'uplifting': 'lighthearted', 'cheerful': 'lighthearted',
+    'dark': 'dark', 'gritty': 'dark', 'bleak': 'dark', 'emotional': 'emotional', 'sad': 'emotional',
+    'tearjerker': 'emotional', 'intense': 'intense', 'gripping': 'intense', 'action-packed': 'intense',
+}
+
+DURATION_KEYWORDS = {
+    'short': 'short', 'quick': 'short', 'long': 'long', 'binge': 'multi-season',
+    'one season': 'one season', 'one-season': 'one season', 'miniseries': 'one season',
+    'limited series': 'one season',
+}
+
+# Words (and phrases) that carry no filterable intent.
+STOPWORDS = set("""
+a an the and or of to for in on at by with about from into is are be it its this that these those
+i i'm im i'd id i've me my we us you your can could would will please do does did have has got get
+give find need want wanna like love looking look watch watching see something anything any some one
+ones recommend suggest good great nice best perfect tonight now right mood feel feeling just really
+kind sort type maybe there what how which lately bored relax relaxing while evening weekend up
+let's lets pretty very also either rated
+""".split()) | {'show me', 'in the mood for', 'right now'}
+
+_MAX_PHRASE_WORDS = 4
+
+_NUMBER_WORDS = {'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'half an': 0.5}
+_UPPER_BOUNDS = ('under', 'less than', 'shorter than', 'below', 'within', 'at most', 'up to')
+_LOWER_BOUNDS = ('over', 'more than', 'longer than', 'at least', 'above')
+_DURATION_MINUTES = re.compile(
+    rf"\b({'|'.join(_UPPER_BOUNDS + _LOWER_BOUNDS)})"
+    r"\s+(half an|an?|one|two|three|\d+(?:\.\d+)?)\s*(hours?|hrs?|minutes?|mins?)\b"
+)
+_THEMED = re.compile(r"-(themed|based|related)\b")
+_RELEASE_YEAR = re.compile(r"\b(19[2-9]\d|20[0-4]\d)\b(?!s)")
+_RATING = re.compile(r"\b(nc-17|pg-13|pg 13|tv-ma|tv-14|tv-pg|tv-y7|tv-y|tv-g|pg)\b|\brated (r|g)\b")
+
+def empty_intent():
+    """
+    Returns an intent with every field of the extract_structured_intent schema left empty.
+    """
+    return {
+        "genre": [], "mood": [], "setting": [], "duration": "", "duration_minutes": "", "type": [],
+        "actors": [], "theme": [], "director": [], "title": [], "cast": [], "country": [],
+        "rating": "", "release_year": ""
+    }
+
+def has_filters(intent):
+    """
+    Returns whether an intent sets any field used by the catalog filters.
+    """
+    return any(intent.get(key) for key in
+               ("genre", "type", "actors", "country", "rating", "release_year", "duration_minutes"))
+
+def _add(values, value):
+    if value not in values:
+        values.append(value)
+
+def parse_intent(query, filter_index):
+    """
+    Extracts an intent offline from keyword tables, regexes and the catalog's own vocabularies.
+    Produces the same schema as extract_structured_intent, with a confidence equal to the share
+    of the query's content words that were recognized.
+    Args:
+        query (str): User's natural language query.
+        filter_index (dict): Filter index, whose country and cast vocabularies are matched.
+    Returns:
+        tuple: (intent dict, confidence between 0 and 1).
+    """
+    intent = empty_intent()
+    text = _THEMED.sub("", normalize_query(query))
+    explained = set()
+
+    for match in _DURATION_MINUTES.finditer(text):
+        op, amount, unit = match.groups()
+        minutes = float(_NUMBER_WORDS.get(amount, amount)) * (60 if unit.startswith('h') else 1)
+        intent["duration_minutes"] = f"{'<' if op in _UPPER_BOUNDS else '>'} {int(minutes)}"
+        explained.update(match.group(0).split())
+    year = _RELEASE_YEAR.search(text)
+    if year:
+        intent["release_year"] = year.group(1)
+        explained.add(year.group(1))
+    rating = _RATING.search(text)
+    if rating:
+        intent["rating"] = (rating.group(1) or rating.group(2)).replace(' ', '-').upper()
+        explained.update(rating.group(0).split())
+
+    words = text.split()
+    countries, cast = filter_index['country']['lookup'], filter_index['actors']['lookup']
+    i = 0
+    while i < len(words):
+        # Longest phrase starting at word i wins
+        for n in range(min(_MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+            phrase = " ".join(words[i:i + n])
+            if phrase in STOPWORDS and n > 1:
+                explained.update(words[i:i + n])
+            elif phrase in GENRE_KEYWORDS:
+                _add(intent["genre"], GENRE_KEYWORDS[phrase])
+                if phrase in TYPE_KEYWORDS:
+                    _add(intent["type"], TYPE_KEYWORDS[phrase])
+            elif phrase in TYPE_KEYWORDS:
+                _add(intent["type"], TYPE_KEYWORDS[phrase])
+            elif phrase in DEMONYMS:
+                _add(intent["country"], DEMONYMS[phrase])
+            elif phrase in countries and phrase != 'unknown':
+                _add(intent["country"], phrase)
+            elif n > 1 and phrase in cast:
+                _add(intent["actors"], phrase.title())
+            elif phrase in MOOD_KEYWORDS:
+                _add(intent["mood"], MOOD_KEYWORDS[phrase])
+            elif phrase in THEME_KEYWORDS:
+                _add(intent["theme"], THEME_KEYWORDS[phrase])
+            elif phrase in DURATION_KEYWORDS:
+                intent["duration"] = DURATION_KEYWORDS[phrase]
+            else:
+                continue
+            explained.update(words[i:i + n])
+            i += n
+            break
+        else:
+            i += 1
+
+    # "movie or show" means either type, which the filters cannot express
+    if len(intent["type"]) > 1:
+        intent["type"] = []
+
+    content = [w for w in words if w not in STOPWORDS]
+    confidence = sum(w in explained for w in content) / len(content) if content else 0.0
+    return intent, confidence
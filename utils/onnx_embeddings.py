@@ -0,0 +1,99 @@
+import os
+import numpy as np
+
+# Files written by export_onnx_model; the tokenizer is saved next to them.
+ONNX_MODEL_FILE = 'model.onnx'
+ONNX_QUANTIZED_MODEL_FILE = 'model-int8.onnx'
+
+# all-MiniLM-L6-v2 truncates inputs at 256 word pieces.
+MAX_SEQ_LENGTH = 256
+
+
+class OnnxEncoder:
+    """
+    Sentence encoder running an exported MiniLM through ONNX Runtime on CPU.
+    Mirrors the SentenceTransformer pipeline (tokenize, transformer, mean pooling) and the
+    subset of its encode() interface used by utils.embeddings.
+    Args:
+        model_dir (str): Directory written by export_onnx_model.
+        quantized (bool): Use the int8 dynamically quantized model.
+        num_threads (int, optional): ONNX Runtime intra-op threads (defaults to all cores).
+    """
+
+    def __init__(self, model_dir, quantized=False, num_threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        model_file = ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dim = self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, **kwargs):
+        """
+        Encodes texts into mean-pooled (unnormalized) sentence embeddings.
+        Args:
+            texts (list of str): Input text strings.
+            batch_size (int): Texts per inference call; texts are length-sorted to limit padding.
+            show_progress_bar (bool): Print progress every few batches.
+        Returns:
+            np.ndarray: 2D float32 array (shape: [len(texts), embedding_dim]).
+        """
+        output = np.zeros((len(texts), self.dim), dtype=np.float32)
+        order = np.argsort([len(t) for t in texts], kind='stable')[::-1]
+        for n, start in enumerate(range(0, len(texts), batch_size)):
+            rows = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in rows], padding=True, truncation=True,
+                max_length=MAX_SEQ_LENGTH, return_tensors='np'
+            )
+            feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+            mask = encoded['attention_mask'][..., None].astype(np.float32)
+            output[rows] = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if show_progress_bar and n % 50 == 0:
+                print(f"Encoded {min(start + batch_size, len(texts))}/{len(texts)} texts")
+        return output
+
+
+def export_onnx_model(model_name, output_dir, quantize=True):
+    """
+    Exports a SentenceTransformer's transformer to ONNX, optionally with an int8 copy.
+    Args:
+        model_name (str): SentenceTransformer model name, e.g. 'all-MiniLM-L6-v2'.
+        output_dir (str): Directory to write the ONNX model(s) and tokenizer to.
+        quantize (bool): Also write a dynamically quantized int8 model.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    sentence_model = SentenceTransformer(model_name, device='cpu')
+    transformer = sentence_model[0].auto_model.eval()
+    tokenizer = sentence_model.tokenizer
+
+    dummy = tokenizer(["an example query for export"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in dummy]
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes={name: {0: 'batch', 1: 'sequence'} for name in input_names + ['last_hidden_state']},
+            opset_version=17,
+        )
+    tokenizer.save_pretrained(output_dir)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(model_path, os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
@@ -1,10 +1,76 @@
-import openai, json, os
+import openai, json, os, threading
 from dotenv import load_dotenv
+from utils.cache import LRUCache, SQLiteCache, normalize_query
 
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
+# Upper bound on a single OpenAI request, so a hung call does not hold a worker thread forever.
+OPENAI_TIMEOUT_S = float(os.getenv("OPENAI_TIMEOUT_S", "30"))
+
+def make_intent_cache():
+    """
+    Creates the intent cache from environment settings.
+    INTENT_CACHE_SIZE (default 1024) bounds the number of entries, INTENT_CACHE_TTL
+    (seconds, default 86400, 0 disables expiry) sets their lifetime, and INTENT_CACHE_PATH
+    switches to an SQLite file so cached intents survive restarts.
+    Returns:
+        LRUCache or SQLiteCache: Cache mapping normalized queries to intent JSON.
+    """
+    maxsize = int(os.getenv("INTENT_CACHE_SIZE", "1024"))
+    ttl = float(os.getenv("INTENT_CACHE_TTL", "86400")) or None
+    path = os.getenv("INTENT_CACHE_PATH")
+    if path:
+        return SQLiteCache(path, maxsize=maxsize, ttl=ttl)
+    return LRUCache(maxsize=maxsize, ttl=ttl)
+
+# Created on first use rather than at import: under gunicorn's preload_app the import runs in
+# the master, and an SQLite connection opened there would be inherited by every forked worker.
+_UNSET = object()
+intent_cache = _UNSET
+_intent_cache_lock = threading.Lock()
+
+def get_intent_cache():
+    """
+    Returns the intent cache, creating it from environment settings on first use.
+    """
+    global intent_cache
+    if intent_cache is _UNSET:
+        with _intent_cache_lock:
+            if intent_cache is _UNSET:
+                intent_cache = make_intent_cache()
+    return intent_cache
+
+def set_intent_cache(cache):
+    """
+    Replaces the intent cache (any object with get/set/stats, or None to disable caching).
+    Args:
+        cache: The cache to use for extracted intents.
+    """
+    global intent_cache
+    intent_cache = cache
+
 def extract_structured_intent(user_query):
+    """
+    Extracts structured intent from a user query, served from the intent cache when possible.
+    Args:
+        user_query (str): The user's natural language query.
+    Returns:
+        dict: A dictionary containing the structured intent, or None if extraction failed.
+    """
+    cache = get_intent_cache()
+    key = normalize_query(user_query)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+    intent = request_structured_intent(user_query)
+    if cache is not None and intent is not None:
+        cache.set(key, json.dumps(intent))
+    return intent
+
+def request_structured_intent(user_query):
     """
     Extracts structured intent from a user query using OpenAI's GPT-3.5-turbo model.
     Args:
@@ -90,7 +156,8 @@ def extract_structured_intent(user_query):
         response = openai.ChatCompletion.create(
             model="gpt-3.5-turbo-0125",
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.2
+            temperature=0.2,
+            request_timeout=OPENAI_TIMEOUT_S
         )
         content = response.choices[0].message.content
         return json.loads(content)
@@ -1,5 +1,16 @@
+import numpy as np
 import pandas as pd
 
+# Rows per chunk when the catalog CSV is streamed (iter_preprocessed_netflix_data).
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Read as strings so every chunk gets the same dtypes, even one where a column is entirely empty.
+TEXT_COLUMNS = ['show_id', 'type', 'title', 'director', 'cast', 'country', 'date_added', 'rating',
+                'duration', 'listed_in', 'description']
+CSV_DTYPES = {col: str for col in TEXT_COLUMNS}
+
+DURATION_LIKE_RATING = r'(?:min|Season)'
+
 
 def clean_duration_and_rating(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -9,67 +20,87 @@ def clean_duration_and_rating(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame with cleaned duration and rating columns, and duration label.
     """
-    df['duration_cleaned'] = df['duration'].str.extract(r'(\d+)').astype(float)
-    df['duration_like_rating'] = df['rating'].str.contains(r'(min|Season)', na=False)
-    df.loc[df['duration_like_rating'], 'duration_cleaned'] = (
-    df.loc[df['duration_like_rating'], 'rating']
-        .str.extract(r'(\d+)')
-        .squeeze()
-        .astype(float)
-    )
-    df.loc[df['rating'].str.contains(r'(min|Season)', na=False), 'rating'] = "Unrated"
-    
-    df.drop(columns=['duration_like_rating'], inplace=True)
+    # Some rows carry the duration in the rating column; extract once from whichever holds it
+    duration_like_rating = df['rating'].str.contains(DURATION_LIKE_RATING, na=False)
+    source = df['duration'].where(~duration_like_rating, df['rating'])
+    df['duration_cleaned'] = source.str.extract(r'(\d+)', expand=False).astype(float)
+    df.loc[duration_like_rating, 'rating'] = "Unrated"
+
     df.drop(columns=['duration'], inplace=True)
+    return df
 
+def duration_fill_stats(df: pd.DataFrame) -> dict:
+    """
+    Sufficient statistics for the imputation values, mergeable across chunks with merge_fill_stats.
+    Args:
+        df (pd.DataFrame): DataFrame with 'type' and 'duration_cleaned' columns.
+    Returns:
+        dict: Movie duration sum and count, and counts of each TV show season number.
+    """
+    movies = df.loc[df['type'] == 'Movie', 'duration_cleaned'].dropna()
+    seasons = df.loc[df['type'] == 'TV Show', 'duration_cleaned'].dropna()
+    return {'movie_sum': float(movies.sum()), 'movie_count': len(movies),
+            'season_counts': seasons.value_counts()}
 
-    return df
+def merge_fill_stats(a: dict, b: dict) -> dict:
+    """
+    Combines the duration_fill_stats of two chunks.
+    """
+    return {'movie_sum': a['movie_sum'] + b['movie_sum'], 'movie_count': a['movie_count'] + b['movie_count'],
+            'season_counts': a['season_counts'].add(b['season_counts'], fill_value=0)}
 
-def impute_missing_duration(df: pd.DataFrame) -> pd.DataFrame:
+def duration_fill_values(stats: dict) -> dict:
+    """
+    Imputation values from duration_fill_stats: mean movie duration and median season count.
+    Args:
+        stats (dict): Statistics over the whole catalog.
+    Returns:
+        dict: Fill value per type ('Movie', 'TV Show'), rounded to 2 decimals.
+    """
+    movie_mean = stats['movie_sum'] / stats['movie_count'] if stats['movie_count'] else np.nan
+
+    counts = stats['season_counts'].sort_index()
+    total = int(counts.sum())
+    tv_median = np.nan
+    if total:
+        # The median from value counts: the middle one or two values of the sorted durations
+        middle = np.searchsorted(np.cumsum(counts.to_numpy()), [(total - 1) // 2, total // 2], side='right')
+        tv_median = float(counts.index.to_numpy()[middle].mean())
+    return {'Movie': round(movie_mean, 2), 'TV Show': round(tv_median, 2)}
+
+def impute_missing_duration(df: pd.DataFrame, fill_values: dict = None) -> pd.DataFrame:
     """
     Imputes missing values in 'duration_cleaned' using mean for movies and median for TV shows.
     Args:
         df (pd.DataFrame): Input DataFrame.
+        fill_values (dict, optional): Precomputed fill value per type (see duration_fill_values),
+            needed when df is one chunk of a larger catalog. Computed from df by default.
     Returns:
         pd.DataFrame: DataFrame with imputed 'duration_cleaned'.
     """
-    movies = df[df['type'] == 'Movie']
-    movie_mean = round(movies['duration_cleaned'].mean(), 2)
-    df.loc[
-        (df['type'] == 'Movie') & (df['duration_cleaned'].isna()),
-        'duration_cleaned'
-    ] = movie_mean
-
-    tv_shows = df[df['type'] == 'TV Show']
-    tv_median = round(tv_shows['duration_cleaned'].median(), 2)
-    df.loc[
-        (df['type'] == 'TV Show') & (df['duration_cleaned'].isna()),
-        'duration_cleaned'
-    ] = tv_median
-
+    if fill_values is None:
+        fill_values = duration_fill_values(duration_fill_stats(df))
+    for show_type, value in fill_values.items():
+        df.loc[(df['type'] == show_type) & df['duration_cleaned'].isna(), 'duration_cleaned'] = value
     return df
 
-def categorize_duration(row):
+def label_durations(df: pd.DataFrame) -> np.ndarray:
     """
-    Categorizes the duration of a row based on its type and cleaned duration.
+    Categorizes the duration of every row based on its type and cleaned duration.
     Args:
-        row (pd.Series): A row from the DataFrame.
+        df (pd.DataFrame): DataFrame with 'type' and 'duration_cleaned' columns.
     Returns:
-        str: Duration category label.
-    """
-    if row['type'] == 'Movie':
-        if row['duration_cleaned'] < 60:
-            return "very short movie"
-        elif row['duration_cleaned'] < 120:
-            return "short movie"
-        else:
-            return "long movie"
-    elif row['type'] == 'TV Show':
-        if row['duration_cleaned'] == 1:
-          return "one season show"
-        elif row['duration_cleaned'] > 1:
-          return "multi-season show"
-    return "unknown"
+        np.ndarray: Duration category label per row.
+    """
+    is_movie = df['type'] == 'Movie'
+    is_show = df['type'] == 'TV Show'
+    duration = df['duration_cleaned']
+    return np.select(
+        [is_movie & (duration < 60), is_movie & (duration < 120), is_movie,
+         is_show & (duration == 1), is_show & (duration > 1)],
+        ["very short movie", "short movie", "long movie", "one season show", "multi-season show"],
+        default="unknown",
+    )
 
 
 def create_embedding_input(df: pd.DataFrame) -> pd.DataFrame:
@@ -95,17 +126,15 @@ def create_embedding_input(df: pd.DataFrame) -> pd.DataFrame:
     )
     return df
 
-def preprocess_netflix_data(file_path: str) -> pd.DataFrame:
+def preprocess_frame(df: pd.DataFrame, fill_values: dict = None) -> pd.DataFrame:
     """
-    Runs the full preprocessing pipeline on the Netflix data CSV file.
+    Preprocesses raw catalog rows (the whole CSV or one chunk of it).
     Args:
-        file_path (str): Path to the CSV file.
+        df (pd.DataFrame): Raw rows indexed by show_id.
+        fill_values (dict, optional): Duration imputation values for the whole catalog.
     Returns:
-        pd.DataFrame: Fully preprocessed DataFrame ready for downstream tasks.
+        pd.DataFrame: Preprocessed rows.
     """
-    df = pd.read_csv(file_path)
-    df.set_index('show_id', inplace=True)
-
     # Fill missing text fields
     for col in ["director", "cast", "country"]:
         df[col] = df[col].fillna("Unknown").astype(str)
@@ -117,13 +146,56 @@ def preprocess_netflix_data(file_path: str) -> pd.DataFrame:
 
     # Clean and encode duration and rating
     df = clean_duration_and_rating(df)
-    df = impute_missing_duration(df)
-    
-    df['duration_label'] = df.apply(categorize_duration, axis=1)
-    
+    df = impute_missing_duration(df, fill_values)
+
+    df['duration_label'] = label_durations(df)
+
     df['rating'] = df['rating'].fillna('Unrated')
     df['rating'] = df['rating'].str.strip().str.upper()
 
-    df = create_embedding_input(df)
+    return create_embedding_input(df)
+
+def preprocess_netflix_data(file_path: str) -> pd.DataFrame:
+    """
+    Runs the full preprocessing pipeline on the Netflix data CSV file.
+    Args:
+        file_path (str): Path to the CSV file.
+    Returns:
+        pd.DataFrame: Fully preprocessed DataFrame ready for downstream tasks.
+    """
+    df = pd.read_csv(file_path, dtype=CSV_DTYPES)
+    df.set_index('show_id', inplace=True)
+    return preprocess_frame(df)
+
+def scan_duration_fill_values(file_path: str, chunksize: int = DEFAULT_CHUNK_ROWS) -> dict:
+    """
+    Computes the duration imputation values of a catalog CSV in one pass over its duration columns.
+    Args:
+        file_path (str): Path to the CSV file.
+        chunksize (int): Rows read at a time.
+    Returns:
+        dict: Fill value per type (see duration_fill_values).
+    """
+    stats = None
+    for chunk in pd.read_csv(file_path, usecols=['type', 'rating', 'duration'], dtype=CSV_DTYPES, chunksize=chunksize):
+        chunk_stats = duration_fill_stats(clean_duration_and_rating(chunk))
+        stats = chunk_stats if stats is None else merge_fill_stats(stats, chunk_stats)
+    return duration_fill_values(stats)
 
-    return df
\ No newline at end of file
+def iter_preprocessed_netflix_data(file_path: str, chunksize: int = DEFAULT_CHUNK_ROWS, fill_values: dict = None):
+    """
+    Streams the preprocessing pipeline over a catalog CSV in chunks, so memory stays bounded by
+    the chunk size. Concatenating the chunks gives the same rows as preprocess_netflix_data.
+    Args:
+        file_path (str): Path to the CSV file.
+        chunksize (int): Rows per chunk.
+        fill_values (dict, optional): Duration imputation values; computed with an extra pass
+            over the duration columns (scan_duration_fill_values) by default.
+    Yields:
+        pd.DataFrame: Preprocessed chunks indexed by show_id.
+    """
+    if fill_values is None:
+        fill_values = scan_duration_fill_values(file_path, chunksize)
+    for chunk in pd.read_csv(file_path, dtype=CSV_DTYPES, chunksize=chunksize):
+        chunk.set_index('show_id', inplace=True)
+        yield preprocess_frame(chunk, fill_values)
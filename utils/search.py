@@ -1,56 +1,120 @@
 from utils.openai_intent import extract_structured_intent
-from utils.embeddings import embed_query
+from utils.embeddings import embed_queries
+from utils.filter_index import build_filter_index, intent_row_mask, intent_rows
+from utils.local_intent import LOCAL_INTENT_MIN_CONFIDENCE, has_filters, parse_intent
+from utils.faiss_io import search_index, selector_search_params, supports_id_selector
+from utils.text_index import bm25_rows
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 import faiss
 import numpy as np
+import os
+import time
 
-def filter_catalog_by_intent(df, intent):
+# Filtered subsets up to this fraction of the catalog are scored by gathering
+# their rows from the embedding matrix; larger ones scan the FAISS index with
+# an ID selector instead, unless the index cannot take one (flat PQ).
+SUBSET_GATHER_FRACTION = 0.25
+
+# Runs intent extraction (an OpenAI round-trip) while the request thread embeds
+# the raw query and retrieves fallback candidates.
+intent_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("INTENT_WORKERS", "16")), thread_name_prefix='intent'
+)
+
+# Latency budget for intent extraction; past it the request is answered from the
+# raw-query results while the late intent still lands in the intent cache.
+# 0 waits indefinitely.
+INTENT_DEADLINE_MS = float(os.getenv("INTENT_DEADLINE_MS", "2500"))
+
+# Whether servers pass the release's BM25 text index to searches (1 enables hybrid search).
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "0") == "1"
+
+# Hybrid search: when a BM25 text index is passed, this many candidates from each of the
+# semantic and lexical rankings are merged by reciprocal rank fusion (score = sum of
+# 1 / (RRF_K + rank)), so exact names and titles the embedding misses still reach the top-k.
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+def filter_catalog_by_intent(df, intent, filter_index=None):
     """
     Filters the catalog DataFrame based on the intent.
     Args:
         df (pd.DataFrame): Input DataFrame.
         intent (dict): Intent dictionary.
+        filter_index (dict, optional): Prebuilt filter index for df; built on the fly if omitted.
     Returns:
         pd.DataFrame: Filtered DataFrame.
     """
-    filtered = df.copy()
-
-    if intent.get("genre"):
-        for g in intent['genre']:
-            filtered = filtered[filtered['listed_in'].str.lower().str.contains(g.lower())]
+    if filter_index is None:
+        filter_index = build_filter_index(df)
+    return df.iloc[intent_rows(filter_index, intent)]
 
-    if intent.get("type"):
-        for t in intent['type']:
-            filtered = filtered[filtered['type'].str.lower() == t.lower()]
-    
-    if intent.get("actors"):
-        for actor in intent['actors']:
-            filtered = filtered[filtered['cast'].str.lower().str.contains(actor.lower())]
+def top_k_in_rows(query_embedding, mask, index, top_k, embeddings=None):
+    """
+    Finds the top-k catalog rows by inner product, restricted to a row mask.
+    Args:
+        query_embedding (np.ndarray): 2D normalized query embedding (shape: [1, embedding_dim]).
+        mask (np.ndarray): Boolean mask over catalog rows (row position == FAISS id).
+        index (faiss.Index): FAISS index over the catalog.
+        top_k (int): Number of top results to return.
+        embeddings (np.ndarray, optional): Catalog embedding matrix row-aligned with the index.
+    Returns:
+        np.ndarray: Row positions of the best matches, best first.
+    """
+    rows = np.flatnonzero(mask)
+    gather = len(rows) <= SUBSET_GATHER_FRACTION * len(mask) or not supports_id_selector(index)
+    if embeddings is not None and gather:
+        scores = embeddings[rows] @ query_embedding[0]
+        k = min(top_k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return rows[top[np.argsort(-scores[top])]]
+    if not supports_id_selector(index):
+        # Without the matrix, widen an unfiltered search until enough results pass the mask
+        k = top_k
+        while True:
+            k = min(4 * k, index.ntotal)
+            found = search_index(index, query_embedding, k)[0]
+            found = found[found >= 0]
+            found = found[mask[found]]
+            if len(found) >= top_k or k >= index.ntotal:
+                return found[:top_k]
 
-    if intent.get("country"):
-        for c in intent['country']:
-            filtered = filtered[filtered['country'].str.lower().str.contains(c.lower())]
+    bitmap = np.packbits(mask, bitorder='little')
+    params = selector_search_params(index, faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap)))
+    I = search_index(index, query_embedding, top_k, embeddings, params)
+    return I[0][I[0] >= 0]
 
-    if intent.get("rating"):
-        filtered = filtered[filtered['rating'].str.lower() == intent['rating'].lower()]
+def fuse_rankings(rankings, top_k, k=RRF_K):
+    """
+    Merges rankings of catalog rows by reciprocal rank fusion.
+    Args:
+        rankings (list of np.ndarray): Row positions per retriever, best first.
+        top_k (int): Number of rows to return.
+        k (int): RRF constant; larger values flatten the advantage of top ranks.
+    Returns:
+        np.ndarray: Row positions by fused score, best first (ties keep the earlier ranking's order).
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking.tolist()):
+            scores[row] = scores.get(row, 0.0) + 1.0 / (k + rank + 1)
+    return np.array(sorted(scores, key=scores.get, reverse=True)[:top_k], dtype=np.int64)
 
-    if intent.get("release_year"):
-        filtered = filtered[filtered['release_year'] == int(intent['release_year'])]
+def raw_query_rows(queries, index, top_k, embeddings=None):
+    """
+    Retrieves the top-k catalog rows for raw query texts with one encode and one FAISS search.
+    Args:
+        queries (list of str): User queries.
+        index (faiss.Index): FAISS index.
+        top_k (int): Number of top results to return per query.
+        embeddings (np.ndarray, optional): Catalog embedding matrix, to re-rank lossy indexes.
+    Returns:
+        list of np.ndarray: Row positions of the best matches per query, best first.
+    """
+    I = search_index(index, embed_queries(queries), top_k, embeddings)
+    return [found[found >= 0] for found in I]
 
-    if intent.get("duration_minutes"):
-        try:
-            dur = intent["duration_minutes"]
-            if '<' in dur:
-                threshold = int(dur.split('<')[-1].strip())
-                filtered = filtered[filtered['duration_cleaned'] < threshold]
-            elif '>' in dur:
-                threshold = int(dur.split('>')[-1].strip())
-                filtered = filtered[filtered['duration_cleaned'] > threshold]
-        except:
-            pass
-    
-    return filtered
-
-def search_fallback(query, index, id_map, top_k=5):
+def search_fallback(query, index, id_map, top_k=5, embeddings=None, text_index=None):
     """
     Fallback search function when intent-based filtering fails.
     Args:
@@ -58,49 +122,141 @@ def search_fallback(query, index, id_map, top_k=5):
         index (faiss.Index): FAISS index.
         id_map (pd.DataFrame): ID map DataFrame.
         top_k (int): Number of top results to return.
+        embeddings (np.ndarray, optional): Catalog embedding matrix, to re-rank lossy indexes.
+        text_index (dict, optional): BM25 text index for id_map; fuses lexical matches into the results.
     Returns:
         pd.DataFrame: Filtered DataFrame with top results.
     """
-    query_embedding = embed_query(query)
-    D, I = index.search(query_embedding, top_k)
-    return id_map.iloc[I[0]]
+    if text_index is None:
+        return id_map.iloc[raw_query_rows([query], index, top_k, embeddings)[0]]
+    depth = max(top_k, HYBRID_CANDIDATES)
+    rows = raw_query_rows([query], index, depth, embeddings)[0]
+    return id_map.iloc[fuse_rankings([rows, bm25_rows(text_index, query, depth)], top_k)]
 
-def search_with_intent(query, index, id_map, top_k=5):
+def build_enriched_query(query, intent):
+    """
+    Appends the intent's non-empty values to the query text.
+    Args:
+        query (str): User's natural language query.
+        intent (dict): Intent dictionary.
+    Returns:
+        str: Enriched query used for the embedding search.
+    """
+    enriched_parts = [query]
+    for key, value in intent.items():
+        if isinstance(value, str) and value.strip():
+            enriched_parts.append(value.strip())
+        elif isinstance(value, list) and value:
+            enriched_parts.extend([v.strip() for v in value if v.strip()])
+    return ". ".join(enriched_parts)
+
+def search_with_intent(query, index, id_map, top_k=5, filter_index=None, embeddings=None,
+                       intent_deadline_ms=None, text_index=None):
     """
     Searches the catalog DataFrame with a user query and intent.
+    Queries the local parser understands confidently skip the LLM. Otherwise intent extraction
+    runs concurrently with the raw-query embedding and FAISS search, so latency is roughly
+    max(LLM, embedding) rather than their sum; past the deadline the local intent is used.
     Args:
         query (str): User's natural language query.
         index (faiss.Index): FAISS index.
         id_map (pd.DataFrame): ID map DataFrame.
         top_k (int): Number of top results to return.
+        filter_index (dict, optional): Prebuilt filter index for id_map.
+        embeddings (np.ndarray, optional): Catalog embedding matrix row-aligned with id_map,
+            used to score small filtered subsets directly.
+        intent_deadline_ms (float, optional): Intent latency budget; defaults to INTENT_DEADLINE_MS.
+        text_index (dict, optional): BM25 text index for id_map; enables hybrid (fused) retrieval.
     Returns:
         pd.DataFrame: Filtered DataFrame with top results.
     """
-    intent = extract_structured_intent(query)
-    filtered_df = filter_catalog_by_intent(id_map, intent)
+    return search_many([query], index, id_map, top_k, filter_index, embeddings, intent_deadline_ms, text_index)[0]
+
+def search_many(queries, index, id_map, top_k=5, filter_index=None, embeddings=None,
+                intent_deadline_ms=None, text_index=None):
+    """
+    Runs search_with_intent for several queries with batched embedding and retrieval.
+    All raw queries, then all enriched queries, are embedded in one encode call each and
+    searched with one FAISS call; intent extraction for the queries that need the LLM runs
+    in parallel under a shared deadline. With a text index, each query's semantic candidates
+    are fused with its BM25 matches (within the same intent filters).
+    Args:
+        queries (list of str): User queries.
+        index (faiss.Index): FAISS index.
+        id_map (pd.DataFrame): ID map DataFrame.
+        top_k (int): Number of top results to return per query.
+        filter_index (dict, optional): Prebuilt filter index for id_map.
+        embeddings (np.ndarray, optional): Catalog embedding matrix row-aligned with id_map.
+        intent_deadline_ms (float, optional): Intent latency budget; defaults to INTENT_DEADLINE_MS.
+        text_index (dict, optional): BM25 text index for id_map; enables hybrid (fused) retrieval.
+    Returns:
+        list of pd.DataFrame: Top results for each query, in input order.
+    """
+    if intent_deadline_ms is None:
+        intent_deadline_ms = INTENT_DEADLINE_MS
+    if filter_index is None:
+        filter_index = build_filter_index(id_map)
+    deadline = time.monotonic() + intent_deadline_ms / 1000 if intent_deadline_ms else None
+    # Hybrid search fuses deeper candidate lists before cutting to top_k
+    depth = max(top_k, HYBRID_CANDIDATES) if text_index is not None else top_k
 
-    if len(filtered_df) == 0:
-        print("No shows match intent filters. Returning top results for raw query.")
-        return search_fallback(query, index, id_map, top_k)
+    # Common queries are parsed locally; only the rest pay for the LLM call
+    parsed = [parse_intent(query, filter_index) for query in queries]
+    intents = [intent if confidence >= LOCAL_INTENT_MIN_CONFIDENCE else None for intent, confidence in parsed]
+    futures = {i: intent_executor.submit(extract_structured_intent, query)
+               for i, query in enumerate(queries) if intents[i] is None}
 
-    # Build enriched query
-    enriched_parts = [query]
-    for key, value in intent.items():
-        if isinstance(value, str) and value.strip():
-            enriched_parts.append(value.strip())
-        elif isinstance(value, list) and value:
-            enriched_parts.extend([v.strip() for v in value if v.strip()])
-    enriched_query = ". ".join(enriched_parts)
+    # The raw-query search does not depend on the intent, so it runs while the LLM calls are in flight
+    fallback_rows = {}
+    if futures:
+        fallback_rows = dict(zip(futures, raw_query_rows([queries[i] for i in futures], index, depth, embeddings)))
+
+    for i, future in futures.items():
+        try:
+            timeout = max(deadline - time.monotonic(), 0) if deadline else None
+            intents[i] = future.result(timeout=timeout)
+        except TimeoutError:
+            print(f"Intent extraction exceeded {intent_deadline_ms:.0f} ms. Using the local intent parser.")
+        if not intents[i] and has_filters(parsed[i][0]):
+            intents[i] = parsed[i][0]
 
-    # Get embeddings for the filtered subset
-    filtered_embeddings = np.vstack(filtered_df['embedding'].to_numpy())
-    filtered_ids = filtered_df.index.tolist()
+    masks = [intent_row_mask(filter_index, intent) if intent else None for intent in intents]
+    searchable = [i for i, mask in enumerate(masks) if mask is not None and mask.any()]
+    needs_fallback = [i for i in range(len(queries)) if i not in set(searchable)]
+    for i in needs_fallback:
+        if intents[i]:
+            print("No shows match intent filters. Returning top results for raw query.")
+        else:
+            print("No intent extracted. Returning top results for raw query.")
+    missing = [i for i in needs_fallback if i not in fallback_rows]
+    if missing:
+        fallback_rows.update(zip(missing, raw_query_rows([queries[i] for i in missing], index, depth, embeddings)))
 
-    query_embedding = embed_query(enriched_query)
-    scores = np.dot(filtered_embeddings, query_embedding.T).flatten()
-    top_indices = np.argsort(-scores)[:top_k]
+    # Score only the filtered rows, against the matrix or the FAISS index
+    results = [None] * len(queries)
+    search_texts = list(queries)
+    for i in searchable:
+        search_texts[i] = build_enriched_query(queries[i], intents[i])
+    if searchable:
+        query_embeddings = embed_queries([search_texts[i] for i in searchable])
+        # Masks never include deleted rows, so "every live row" means unfiltered
+        live_rows = np.count_nonzero(filter_index['live']) if 'live' in filter_index else filter_index['num_rows']
+        unfiltered = [j for j, i in enumerate(searchable) if np.count_nonzero(masks[i]) == live_rows]
+        if unfiltered:
+            I = search_index(index, query_embeddings[unfiltered], depth, embeddings)
+            for j, found in zip(unfiltered, I):
+                results[searchable[j]] = found[found >= 0]
+        for j, i in enumerate(searchable):
+            if results[i] is None:
+                results[i] = top_k_in_rows(query_embeddings[j:j + 1], masks[i], index, depth, embeddings)
 
-    # Map top indices back to original IDs
-    matched_ids = [filtered_ids[i] for i in top_indices]
-    
-    return id_map.loc[matched_ids]
\ No newline at end of file
+    for i in needs_fallback:
+        results[i] = fallback_rows[i]
+    if text_index is not None:
+        # Lexical matches for the same text, held to the same intent filters as the semantic ones
+        filtered = set(searchable)
+        results = [
+            fuse_rankings([rows, bm25_rows(text_index, search_texts[i], depth, masks[i] if i in filtered else None)], top_k)
+            for i, rows in enumerate(results)
+        ]
+    return [id_map.iloc[rows] for rows in results]
@@ -0,0 +1,140 @@
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils.embeddings import EMBEDDING_BACKEND, MODEL_NAME, embed_with_store, load_model
+
+# Rows per shard: the unit of work sent to a worker and of progress saved to disk.
+DEFAULT_SHARD_ROWS = 4096
+
+# Model loaded once per worker process by _init_worker.
+_worker_model = None
+
+def _init_worker(backend, num_threads):
+    global _worker_model
+    _worker_model = load_model(backend, num_threads)
+
+def _embed_shard(path, texts, batch_size):
+    """
+    Encodes one shard with the worker's model and writes its normalized float32 vectors to path.
+    The file appears under its final name only once complete, so a crash never leaves a partial shard.
+    """
+    embeddings = np.asarray(_worker_model.encode(texts, batch_size=batch_size), dtype=np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, embeddings)
+    os.replace(tmp_path, path)
+
+def shard_key(texts, backend=None):
+    """
+    Names a shard by the model and the exact texts it embeds, so a resumed build only reuses
+    shards whose inputs are unchanged, whatever the catalog order or chunking.
+    """
+    digest = hashlib.sha1(f"{MODEL_NAME}:{backend or EMBEDDING_BACKEND}".encode('utf-8'))
+    for text in texts:
+        digest.update(b'\0' + str(text).encode('utf-8'))
+    return digest.hexdigest()[:24]
+
+class ShardedEmbedder:
+    """
+    Embeds catalog texts in fixed-size shards on a process pool (one model per worker) and
+    writes each shard's vectors to shard_dir as it completes. Calling it again after a crash
+    reuses completed shards and only embeds the rest; texts already in the embedding store
+    (utils.embeddings.get_embedding_store) are not embedded at all. Usable wherever an
+    embed(texts) callable is expected (build_index.py, utils.catalog_update.update_catalog).
+    Args:
+        shard_dir (str): Directory for completed shards.
+        workers (int): Worker processes; 0 embeds in this process (still sharded and resumable).
+        shard_rows (int): Rows per shard.
+        batch_size (int): Texts per model.encode batch.
+        num_threads (int, optional): Inference threads per worker (defaults to all cores).
+        backend (str, optional): Embedding backend; defaults to EMBEDDING_BACKEND.
+    """
+
+    def __init__(self, shard_dir, workers=0, shard_rows=DEFAULT_SHARD_ROWS, batch_size=64,
+                 num_threads=None, backend=None):
+        os.makedirs(shard_dir, exist_ok=True)
+        self.shard_dir = shard_dir
+        self.shard_rows = shard_rows
+        self.batch_size = batch_size
+        self.backend = backend or EMBEDDING_BACKEND
+        self.pool = None
+        if workers > 0:
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.backend, num_threads),
+            )
+        elif _worker_model is None:
+            _init_worker(self.backend, num_threads)
+        self.embedded_rows = 0
+        self.resumed_rows = 0
+        self.elapsed_s = 0.0
+
+    def _load_shard(self, path, rows):
+        try:
+            embeddings = np.load(path)
+        except (OSError, ValueError):
+            return None
+        return embeddings if embeddings.ndim == 2 and len(embeddings) == rows else None
+
+    def __call__(self, texts):
+        """
+        Embeds texts, reusing vectors from the embedding store and completed shards.
+        Args:
+            texts (list of str): Input text strings.
+        Returns:
+            np.ndarray: Normalized float32 embeddings, row-aligned with texts.
+        """
+        return embed_with_store(texts, self._embed_shards, self.backend)
+
+    def _embed_shards(self, texts):
+        """
+        Embeds texts in shards, reusing completed ones.
+        Args:
+            texts (list of str): Input text strings.
+        Returns:
+            np.ndarray: Normalized float32 embeddings, row-aligned with texts.
+        """
+        start = time.perf_counter()
+        shards = [texts[i:i + self.shard_rows] for i in range(0, len(texts), self.shard_rows)]
+        paths = [os.path.join(self.shard_dir, f"{shard_key(shard, self.backend)}.npy") for shard in shards]
+        results = [self._load_shard(path, len(shard)) for path, shard in zip(paths, shards)]
+        pending = [i for i, result in enumerate(results) if result is None]
+        self.resumed_rows += sum(len(shard) for shard, result in zip(shards, results) if result is not None)
+
+        if self.pool is not None:
+            futures = [self.pool.submit(_embed_shard, paths[i], shards[i], self.batch_size) for i in pending]
+            for future in futures:
+                future.result()
+        else:
+            for i in pending:
+                _embed_shard(paths[i], shards[i], self.batch_size)
+        for i in pending:
+            results[i] = np.load(paths[i])
+
+        rows = sum(len(shards[i]) for i in pending)
+        self.embedded_rows += rows
+        self.elapsed_s += time.perf_counter() - start
+        if shards:
+            print(f"Embedded {rows} rows in {len(pending)} shards, reused {len(shards) - len(pending)} "
+                  f"({self.rows_per_second():,.0f} rows/s so far)")
+        return np.vstack(results) if results else np.zeros((0, 0), dtype=np.float32)
+
+    def rows_per_second(self):
+        """
+        Embedding throughput over all calls, excluding reused shards.
+        """
+        return self.embedded_rows / self.elapsed_s if self.elapsed_s else 0.0
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
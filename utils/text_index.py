@@ -0,0 +1,145 @@
+import re
+from collections import Counter
+import numpy as np
+
+# BM25 over each title's embedding_input, for queries the embedding misses (names, exact titles).
+# Posting lists are CSR arrays like the filter index; each posting stores its precomputed
+# BM25 term-frequency weight, so scoring a query is one gather-add per query term.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"\w+")
+# Words too common in queries to say anything about a title.
+STOPWORDS = frozenset("""
+a about an and any anything are as at be but by can could do for from get got have i i'm im in into is it
+its like me movie movies my of on or show shows some something that the there this to tonight want
+watch what with would you your
+""".split())
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase word tokens, dropping stopwords.
+    Args:
+        text (str): Input text.
+    Returns:
+        list: Tokens in order.
+    """
+    if not isinstance(text, str):
+        return []
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _prepare(text_index):
+    """
+    Adds the term -> id lookup used at query time to a built or loaded text index.
+    """
+    text_index['lookup'] = {term: i for i, term in enumerate(text_index['terms'].tolist())}
+    return text_index
+
+
+def build_text_index(df, column='embedding_input'):
+    """
+    Builds a BM25 inverted index over a text column. Rows deleted by incremental builds are left out.
+    Args:
+        df (pd.DataFrame): ID map DataFrame (row positions must match FAISS ids).
+        column (str): Text column to index.
+    Returns:
+        dict: 'terms' (sorted str array), 'offsets' (int64), 'postings' (int32 row positions),
+        'weights' (float32 BM25 tf weight per posting), 'idf' (float32 per term) and 'num_rows'.
+    """
+    live = ~df['deleted'].to_numpy(dtype=bool) if 'deleted' in df else np.ones(len(df), dtype=bool)
+    lists, doc_len = {}, np.zeros(len(df), dtype=np.float32)
+    for row, text in enumerate(df[column].tolist()):
+        if not live[row]:
+            continue
+        counts = Counter(tokenize(text))
+        doc_len[row] = sum(counts.values())
+        for term, tf in counts.items():
+            lists.setdefault(term, []).append((row, tf))
+
+    terms = sorted(lists)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(lists[t]) for t in terms])
+    pairs = np.array([pair for t in terms for pair in lists[t]], dtype=np.int64).reshape(-1, 2)
+    postings, tf = pairs[:, 0].astype(np.int32), pairs[:, 1].astype(np.float32)
+
+    num_docs = max(int(live.sum()), 1)
+    avg_len = doc_len[live].mean() if live.any() else 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[postings] / avg_len)
+    doc_freq = np.diff(offsets).astype(np.float32)
+    return _prepare({
+        'terms': np.array(terms, dtype=str),
+        'offsets': offsets,
+        'postings': postings,
+        'weights': (tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32),
+        'idf': np.log1p((num_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32),
+        'num_rows': len(df),
+    })
+
+
+def save_text_index(text_index, path):
+    """
+    Saves the text index to an uncompressed .npz archive.
+    Args:
+        text_index (dict): Text index from build_text_index.
+        path (str): The path to save the text index.
+    """
+    arrays = {part: text_index[part] for part in ('terms', 'offsets', 'postings', 'weights', 'idf')}
+    with open(path, 'wb') as f:
+        np.savez(f, num_rows=np.array(text_index['num_rows'], dtype=np.int64), **arrays)
+
+
+def load_text_index(path):
+    """
+    Loads a text index saved with save_text_index.
+    Args:
+        path (str): The path to load the text index from.
+    Returns:
+        dict: The loaded text index.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        text_index = {part: data[part] for part in ('terms', 'offsets', 'postings', 'weights', 'idf')}
+        text_index['num_rows'] = int(data['num_rows'])
+    return _prepare(text_index)
+
+
+def bm25_scores(text_index, query):
+    """
+    Scores every catalog row against a query.
+    Args:
+        text_index (dict): Text index.
+        query (str): Query text.
+    Returns:
+        np.ndarray: float32 BM25 score per row (0 for rows sharing no term with the query).
+    """
+    scores = np.zeros(text_index['num_rows'], dtype=np.float32)
+    offsets, postings, weights, idf = text_index['offsets'], text_index['postings'], text_index['weights'], text_index['idf']
+    for term in set(tokenize(query)):
+        term_id = text_index['lookup'].get(term)
+        if term_id is not None:
+            lo, hi = offsets[term_id], offsets[term_id + 1]
+            scores[postings[lo:hi]] += idf[term_id] * weights[lo:hi]
+    return scores
+
+
+def bm25_rows(text_index, query, top_k, mask=None):
+    """
+    Finds the top-k catalog rows by BM25 score, optionally restricted to a row mask.
+    Args:
+        text_index (dict): Text index.
+        query (str): Query text.
+        top_k (int): Number of rows to return.
+        mask (np.ndarray, optional): Boolean mask over catalog rows (e.g. intent filters).
+    Returns:
+        np.ndarray: Row positions of the best matches, best first (only rows with a positive score).
+    """
+    scores = bm25_scores(text_index, query)
+    if mask is not None:
+        scores[~mask] = 0
+    candidates = np.flatnonzero(scores)
+    k = min(top_k, len(candidates))
+    if k == 0:
+        return candidates.astype(np.int64)
+    top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return top[np.argsort(-scores[top], kind='stable')].astype(np.int64)
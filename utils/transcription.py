@@ -0,0 +1,261 @@
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import speech_recognition as sr
+from utils.audio import TARGET_RATE, to_audio_data
+
+# Speech-to-text engine: 'google' (speech_recognition web API), 'vosk' or 'whisper' (offline,
+# CPU) or 'stub' (deterministic, no model; for tests and load tests).
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "google")
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "models/vosk")
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base.en")
+STUB_TRANSCRIPT = os.getenv("TRANSCRIPTION_STUB_TEXT", "funny movies")
+TRANSCRIPTION_TIMEOUT_S = float(os.getenv("TRANSCRIPTION_TIMEOUT_S", "30"))
+# Seconds of new audio between partial decodes of buffered streams (Whisper; 0 disables them).
+TRANSCRIPTION_PARTIAL_S = float(os.getenv("TRANSCRIPTION_PARTIAL_S", "2"))
+
+# Process pool running the transcriber; see enable_transcription_pool().
+transcription_pool = None
+_transcriber = None
+_transcriber_lock = threading.Lock()
+
+class BufferedStream:
+    """
+    Streaming session for engines without partial results: buffers audio and transcribes it
+    with transcribe(), so decoding runs in the transcription pool when one is enabled.
+    With a pool and a positive partial_interval, it also submits a decode of the audio so far
+    every partial_interval seconds of new audio (at most one in flight) and reports the latest
+    one that has completed as the partial transcript.
+    """
+    def __init__(self, rate=TARGET_RATE, partial_interval=0.0):
+        self.rate = rate
+        self.blocks = []
+        self.samples = 0
+        self.partial_interval = partial_interval
+        self.next_partial = partial_interval * rate
+        self.pending = None
+        self.partial = None
+
+    def _audio(self):
+        return np.concatenate(self.blocks) if self.blocks else np.zeros(0, dtype=np.int16)
+
+    def accept(self, pcm):
+        """
+        Adds audio; returns the latest completed partial transcript, or None if there is none yet.
+        """
+        self.blocks.append(pcm)
+        self.samples += len(pcm)
+        if self.pending is not None and self.pending.done():
+            try:
+                self.partial = self.pending.result()
+            except Exception:
+                pass  # No speech yet or a failed partial; the final decode reports real errors
+            self.pending = None
+        if (self.partial_interval > 0 and transcription_pool is not None and self.pending is None
+                and self.samples >= self.next_partial):
+            self.pending = transcription_pool.submit(_transcribe_in_process, self._audio(), self.rate)
+            self.next_partial = self.samples + self.partial_interval * self.rate
+        return self.partial
+
+    def finish(self):
+        """
+        Returns the final transcript ("" when no speech was recognized).
+        """
+        if self.pending is not None:
+            self.pending.cancel()
+        pcm = self._audio()
+        if not len(pcm):
+            return ""
+        try:
+            return transcribe(pcm, self.rate)
+        except sr.UnknownValueError:
+            return ""
+
+class GoogleTranscriber:
+    """
+    Google Web Speech API via speech_recognition (network round-trip).
+    """
+    def transcribe(self, pcm, rate=TARGET_RATE):
+        return sr.Recognizer().recognize_google(to_audio_data(pcm, rate))
+
+class VoskTranscriber:
+    """
+    Offline Kaldi recognizer; VOSK_MODEL_PATH points to an unpacked Vosk model directory.
+    """
+    streaming = True
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+
+    def transcribe(self, pcm, rate=TARGET_RATE):
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(self.model, rate)
+        recognizer.AcceptWaveform(np.ascontiguousarray(pcm, dtype=np.int16).tobytes())
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+    def open_stream(self, rate=TARGET_RATE):
+        return VoskStream(self.model, rate)
+
+class VoskStream:
+    """
+    Streaming Vosk session reporting partial transcripts as audio arrives.
+    """
+    def __init__(self, model, rate=TARGET_RATE):
+        from vosk import KaldiRecognizer
+        self.recognizer = KaldiRecognizer(model, rate)
+        self.segments = []
+
+    def accept(self, pcm):
+        if self.recognizer.AcceptWaveform(np.ascontiguousarray(pcm, dtype=np.int16).tobytes()):
+            self.segments.append(json.loads(self.recognizer.Result()).get("text", ""))
+            partial = ""
+        else:
+            partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return " ".join(filter(None, self.segments + [partial]))
+
+    def finish(self):
+        self.segments.append(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        return " ".join(filter(None, self.segments))
+
+class WhisperTranscriber:
+    """
+    Offline Whisper (faster-whisper, CTranslate2 int8 on CPU).
+    """
+    partial_decodes = True
+
+    def __init__(self, model_name=WHISPER_MODEL):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(model_name, device="cpu", compute_type="int8", cpu_threads=1)
+
+    def transcribe(self, pcm, rate=TARGET_RATE):
+        if rate != TARGET_RATE:
+            raise ValueError(f"Whisper expects {TARGET_RATE} Hz audio, got {rate} Hz")
+        segments, _ = self.model.transcribe(pcm.astype(np.float32) / 32768.0, language="en", beam_size=1)
+        return " ".join(segment.text.strip() for segment in segments)
+
+class StubTranscriber:
+    """
+    Returns STUB_TRANSCRIPT for any non-empty clip, without loading a model.
+    Streams reveal one more word of it per half second of audio.
+    """
+    streaming = True
+
+    def transcribe(self, pcm, rate=TARGET_RATE):
+        return STUB_TRANSCRIPT if len(pcm) else ""
+
+    def open_stream(self, rate=TARGET_RATE):
+        return StubStream(rate)
+
+class StubStream:
+    def __init__(self, rate=TARGET_RATE):
+        self.rate = rate
+        self.samples = 0
+
+    def accept(self, pcm):
+        self.samples += len(pcm)
+        return " ".join(STUB_TRANSCRIPT.split()[:int(self.samples / self.rate / 0.5)])
+
+    def finish(self):
+        return STUB_TRANSCRIPT if self.samples else ""
+
+TRANSCRIBERS = {
+    'google': GoogleTranscriber, 'vosk': VoskTranscriber,
+    'whisper': WhisperTranscriber, 'stub': StubTranscriber,
+}
+
+def load_transcriber(backend=None):
+    """
+    Loads the speech-to-text engine for a backend.
+    Args:
+        backend (str, optional): 'google', 'vosk', 'whisper' or 'stub'; defaults to TRANSCRIPTION_BACKEND.
+    Returns:
+        object: Transcriber exposing transcribe(pcm, rate).
+    """
+    backend = backend or TRANSCRIPTION_BACKEND
+    if backend not in TRANSCRIBERS:
+        raise ValueError(f"Unknown transcription backend: {backend}")
+    return TRANSCRIBERS[backend]()
+
+def get_transcriber():
+    """
+    Returns this process's transcriber, loading it on first use (thread-safe).
+    """
+    global _transcriber
+    if _transcriber is None:
+        with _transcriber_lock:
+            if _transcriber is None:
+                _transcriber = load_transcriber()
+    return _transcriber
+
+def _transcribe_in_process(pcm, rate):
+    text = get_transcriber().transcribe(pcm, rate).strip()
+    # Same contract as recognize_google: no speech is an error, not an empty transcript
+    if not text:
+        raise sr.UnknownValueError()
+    return text
+
+def _init_pool_worker(backend):
+    global _transcriber
+    _transcriber = load_transcriber(backend)
+
+def enable_transcription_pool(workers=None, backend=None):
+    """
+    Runs transcription in a process pool so model inference does not hold request threads' GIL.
+    Each worker loads the transcriber once at startup. Workers are spawned (not forked), so
+    this is safe to call from threaded servers. Defaults come from TRANSCRIPTION_WORKERS (2);
+    0 keeps transcription in-process.
+    Args:
+        workers (int, optional): Number of worker processes.
+        backend (str, optional): Transcription backend; defaults to TRANSCRIPTION_BACKEND.
+    Returns:
+        ProcessPoolExecutor or None: The active pool.
+    """
+    global transcription_pool
+    workers = workers if workers is not None else int(os.getenv("TRANSCRIPTION_WORKERS", "2"))
+    if transcription_pool is None and workers > 0:
+        transcription_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_pool_worker,
+            initargs=(backend or TRANSCRIPTION_BACKEND,),
+        )
+    return transcription_pool
+
+def transcribe(pcm, rate=TARGET_RATE, timeout=None):
+    """
+    Transcribes mono 16-bit PCM with the configured backend, in the pool when one is enabled.
+    Args:
+        pcm (np.ndarray): Mono int16 samples.
+        rate (int): Sample rate.
+        timeout (float, optional): Seconds to wait for a pool worker; defaults to TRANSCRIPTION_TIMEOUT_S.
+    Returns:
+        str: Transcript.
+    Raises:
+        speech_recognition.UnknownValueError: No speech was recognized.
+    """
+    if transcription_pool is None:
+        return _transcribe_in_process(pcm, rate)
+    future = transcription_pool.submit(_transcribe_in_process, pcm, rate)
+    return future.result(timeout=timeout or TRANSCRIPTION_TIMEOUT_S)
+
+def open_stream(rate=TARGET_RATE):
+    """
+    Starts a streaming transcription session. Engines with native streaming (Vosk, stub) keep
+    a stateful recognizer in this process; the others buffer audio and decode it with
+    transcribe(), in the pool when one is enabled, so no model is loaded in the web worker.
+    Args:
+        rate (int): Sample rate of the audio that will be accepted.
+    Returns:
+        object: Session with accept(pcm) -> partial transcript or None, and finish() -> transcript.
+    """
+    engine = TRANSCRIBERS.get(TRANSCRIPTION_BACKEND)
+    if engine is None:
+        raise ValueError(f"Unknown transcription backend: {TRANSCRIPTION_BACKEND}")
+    if getattr(engine, "streaming", False):
+        return get_transcriber().open_stream(rate)
+    return BufferedStream(rate, TRANSCRIPTION_PARTIAL_S if getattr(engine, "partial_decodes", False) else 0.0)
@@ -1,30 +1,67 @@
-import sounddevice as sd
+import queue
+import time
 import numpy as np
-import io
-from scipy.io.wavfile import write
 import speech_recognition as sr
+from utils.transcription import TRANSCRIPTION_BACKEND, open_stream, transcribe
+from utils.incremental_search import IncrementalSearch
+from voice.endpointing import Endpointer, capture_until_silence
 
-def capture_and_transcribe(duration=12, fs=16000):
+def microphone_frames(fs=16000, block_ms=30):
     """
-    Captures voice from microphone using sounddevice and transcribes to text using Google Speech Recognition.
+    Yields mono int16 blocks from the default microphone until the generator is closed.
+    Args:
+        fs (int): Sample rate.
+        block_ms (int): Block length.
+    Yields:
+        np.ndarray: Audio blocks.
+    """
+    import sounddevice as sd
+    blocks = queue.Queue()
+
+    def callback(indata, frames, time_info, status):
+        blocks.put(indata[:, 0].copy())
+
+    with sd.InputStream(samplerate=fs, channels=1, dtype='int16',
+                        blocksize=int(fs * block_ms / 1000), callback=callback):
+        while True:
+            yield blocks.get()
+
+def record_fixed(duration, fs):
+    """
+    Records exactly duration seconds from the microphone.
+    """
+    import sounddevice as sd
+    audio = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
+    sd.wait()  # Wait until recording is finished
+    return audio.ravel()
+
+def capture_and_transcribe(duration=12, fs=16000, streaming=True, frames=None, **endpointing):
+    """
+    Captures voice from microphone using sounddevice and transcribes it with the configured
+    TRANSCRIPTION_BACKEND (Google Speech Recognition by default).
+    In streaming mode, capture stops after trailing silence and leading silence is trimmed, so
+    short queries are transcribed as soon as the speaker stops; duration is only the upper bound.
+    Args:
+        duration (float): Maximum recording length in seconds.
+        fs (int): Sample rate.
+        streaming (bool): Use endpointing; False records the full duration.
+        frames (iterable of np.ndarray, optional): Audio chunks to use instead of the microphone.
+        **endpointing: Endpointer settings (e.g. trailing_silence_ms).
     """
     print(f"Listening for voice input... Speak now for up to {duration} seconds.")
     try:
-        # Record audio
-        audio = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
-        sd.wait()  # Wait until recording is finished
-        print("Recording complete. Transcribing...")
-
-        # Save to a BytesIO buffer as WAV
-        buf = io.BytesIO()
-        write(buf, fs, audio)
-        buf.seek(0)
-
-        # Use speech_recognition to transcribe
-        recognizer = sr.Recognizer()
-        with sr.AudioFile(buf) as source:
-            audio_data = recognizer.record(source)
-        text = recognizer.recognize_google(audio_data)
+        start = time.perf_counter()
+        if streaming:
+            endpointer = Endpointer(fs=fs, max_duration_s=duration, **endpointing)
+            audio = capture_until_silence(frames if frames is not None else microphone_frames(fs), endpointer)
+            if not len(audio):
+                raise sr.WaitTimeoutError("No speech detected")
+        else:
+            audio = record_fixed(duration, fs) if frames is None else np.concatenate(list(frames))
+        print(f"Recording complete after {time.perf_counter() - start:.1f}s "
+              f"({len(audio) / fs:.1f}s of audio). Transcribing with {TRANSCRIPTION_BACKEND}...")
+
+        text = transcribe(audio, fs)
         print(f"Transcription: {text}")
         return text
     except sr.WaitTimeoutError:
@@ -38,4 +75,69 @@ def capture_and_transcribe(duration=12, fs=16000):
         return "hello world"
     except Exception as e:
         print(f"Error during transcription: {e}")
-        return "hello world" 
\ No newline at end of file
+        return "hello world"
+
+def capture_and_search(index, id_map, top_k=5, filter_index=None, embeddings=None, on_results=None,
+                       duration=12, fs=16000, frames=None, text_index=None, **endpointing):
+    """
+    Search as you speak: streams microphone audio into the transcriber and runs debounced
+    speculative searches on partial transcripts while the user is still talking, then the
+    intent-aware search once endpointing detects the end of the utterance.
+    Args:
+        index (faiss.Index): FAISS index.
+        id_map (pd.DataFrame): ID map DataFrame.
+        top_k (int): Number of results per search.
+        filter_index (dict, optional): Filter index for the final search.
+        embeddings (np.ndarray, optional): Catalog embeddings for the final search.
+        on_results (callable, optional): Called as on_results(transcript, results, final) for
+            every speculative and the final result set.
+        duration (float): Maximum recording length in seconds.
+        fs (int): Sample rate.
+        frames (iterable of np.ndarray, optional): Audio chunks to use instead of the microphone.
+        text_index (dict, optional): BM25 text index; enables hybrid search.
+        **endpointing: Endpointer settings.
+    Returns:
+        tuple: (final transcript, final results DataFrame), or (None, None) if nothing was recognized.
+    """
+    on_results = on_results or (lambda transcript, results, final: None)
+    endpointer = Endpointer(fs=fs, max_duration_s=duration, **endpointing)
+    search = IncrementalSearch(index, id_map, top_k=top_k, filter_index=filter_index, embeddings=embeddings,
+                               text_index=text_index)
+    stream = open_stream(fs)
+    source = frames if frames is not None else microphone_frames(fs)
+    print(f"Listening for voice input... Speak now for up to {duration} seconds.")
+    fed = None
+    try:
+        for chunk in source:
+            stopped = endpointer.feed(chunk)
+            # Leading silence is never sent; the recognizer starts at the clip's pre-roll
+            if endpointer.speech_detected:
+                if fed is None:
+                    fed = max(0, endpointer.speech_start - endpointer.pre_roll_frames)
+                if fed < len(endpointer.frames):
+                    transcript = stream.accept(np.concatenate(endpointer.frames[fed:]))
+                    fed = len(endpointer.frames)
+                    results = search.update(transcript, now=fed * endpointer.frame_len / fs)
+                    if results is not None:
+                        on_results(search.last_query, results, False)
+            if stopped:
+                break
+    finally:
+        if hasattr(source, "close"):
+            source.close()
+
+    if not endpointer.speech_detected:
+        print("No speech detected within timeout period.")
+        return None, None
+    try:
+        transcript = stream.finish()
+    except (sr.UnknownValueError, sr.RequestError) as e:
+        print(f"Transcription failed: {e!r}")
+        return None, None
+    if not transcript:
+        print("Could not understand the audio.")
+        return None, None
+    print(f"Transcription: {transcript}")
+    results = search.finalize(transcript)
+    on_results(transcript, results, True)
+    return transcript, results
@@ -0,0 +1,137 @@
+import numpy as np
+
+class Endpointer:
+    """
+    Energy-based voice activity detection over fixed-size frames.
+    Decides when an utterance has ended (trailing silence after speech) and trims the
+    clip to the speech plus a short pre/post roll. The noise floor adapts to the
+    non-speech frames, so a frame counts as speech when it is louder than both
+    threshold_db and noise floor + margin_db.
+    Args:
+        fs (int): Sample rate.
+        frame_ms (int): Analysis frame length.
+        threshold_db (float): Absolute minimum speech level (dBFS).
+        margin_db (float): Required level above the noise floor.
+        min_speech_ms (int): Consecutive speech needed to start an utterance (ignores clicks).
+        trailing_silence_ms (int): Silence after speech that ends the utterance.
+        pre_roll_ms (int): Audio kept before the detected speech start.
+        post_roll_ms (int): Audio kept after the last speech frame.
+        max_duration_s (float): Hard stop for the whole capture.
+        no_speech_timeout_s (float): Stop if no speech starts within this time.
+    """
+    def __init__(self, fs=16000, frame_ms=30, threshold_db=-45.0, margin_db=10.0, min_speech_ms=90,
+                 trailing_silence_ms=700, pre_roll_ms=200, post_roll_ms=150, max_duration_s=12,
+                 no_speech_timeout_s=5):
+        self.fs = fs
+        self.frame_len = int(fs * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.noise_db = threshold_db - margin_db
+        self.min_speech_frames = max(1, round(min_speech_ms / frame_ms))
+        self.trailing_frames = max(1, round(trailing_silence_ms / frame_ms))
+        self.pre_roll_frames = round(pre_roll_ms / frame_ms)
+        self.post_roll_frames = round(post_roll_ms / frame_ms)
+        self.max_frames = int(max_duration_s * 1000 / frame_ms)
+        self.no_speech_frames = int(no_speech_timeout_s * 1000 / frame_ms)
+
+        self.frames = []
+        self.speech_start = None
+        self.last_speech = None
+        self.done = False
+        self._run = 0
+        self._pending = np.zeros(0, dtype=np.int16)
+
+    @property
+    def speech_detected(self):
+        return self.speech_start is not None
+
+    @staticmethod
+    def frame_db(frame):
+        """
+        RMS level of a frame in dBFS.
+        """
+        rms = np.sqrt(np.mean(frame.astype(np.float32) ** 2))
+        return 20 * np.log10(rms / 32768.0 + 1e-10)
+
+    def feed(self, samples):
+        """
+        Adds a chunk of mono int16 samples (any length).
+        Args:
+            samples (np.ndarray): New audio.
+        Returns:
+            bool: True once the capture should stop.
+        """
+        if self.done:
+            return True
+        buffer = np.concatenate([self._pending, np.asarray(samples, dtype=np.int16).ravel()])
+        complete = len(buffer) // self.frame_len
+        for i in range(complete):
+            self._process(buffer[i * self.frame_len:(i + 1) * self.frame_len])
+            if self.done:
+                break
+        self._pending = buffer[complete * self.frame_len:]
+        return self.done
+
+    def _process(self, frame):
+        index = len(self.frames)
+        self.frames.append(frame)
+        level = self.frame_db(frame)
+
+        if level > max(self.threshold_db, self.noise_db + self.margin_db):
+            self._run += 1
+            if self.speech_start is None and self._run >= self.min_speech_frames:
+                self.speech_start = index - self._run + 1
+            self.last_speech = index
+        else:
+            self._run = 0
+            self.noise_db = 0.95 * self.noise_db + 0.05 * level
+
+        if self.speech_start is not None:
+            self.done = index - self.last_speech >= self.trailing_frames
+        else:
+            self.done = index + 1 >= self.no_speech_frames
+        self.done |= index + 1 >= self.max_frames
+
+    def clip(self):
+        """
+        Returns the utterance with leading and trailing silence trimmed (empty if no speech).
+        """
+        if self.speech_start is None:
+            return np.zeros(0, dtype=np.int16)
+        start = max(0, self.speech_start - self.pre_roll_frames)
+        end = min(len(self.frames), self.last_speech + 1 + self.post_roll_frames)
+        return np.concatenate(self.frames[start:end])
+
+def capture_until_silence(frames, endpointer):
+    """
+    Feeds audio chunks to an endpointer until it stops, then closes the source.
+    Args:
+        frames (iterable of np.ndarray): Mono int16 chunks (a microphone stream or recorded arrays).
+        endpointer (Endpointer): Endpointing state.
+    Returns:
+        np.ndarray: The trimmed utterance (empty if no speech was detected).
+    """
+    try:
+        for chunk in frames:
+            if endpointer.feed(chunk):
+                break
+    finally:
+        if hasattr(frames, "close"):
+            frames.close()
+    return endpointer.clip()
+
+def endpoint_clip(samples, fs=16000, chunk_ms=30, **kwargs):
+    """
+    Runs endpointing over a recorded array as if it arrived from the microphone.
+    Args:
+        samples (np.ndarray): Mono int16 recording.
+        fs (int): Sample rate.
+        chunk_ms (int): Size of the simulated device reads.
+        **kwargs: Endpointer settings.
+    Returns:
+        tuple: (trimmed utterance, Endpointer with the stop position in len(frames)).
+    """
+    endpointer = Endpointer(fs=fs, **kwargs)
+    step = int(fs * chunk_ms / 1000)
+    chunks = (samples[i:i + step] for i in range(0, len(samples), step))
+    return capture_until_silence(chunks, endpointer), endpointer